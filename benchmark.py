@@ -0,0 +1,128 @@
+import argparse
+import concurrent.futures
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from generate import ASSETS
+from util.composer import Composer
+from util.crawler import Crawler
+from util.logger import Logger
+from util.maze import Maze
+from util.writer import Writer
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cases', nargs='+', choices=CASES.keys(), default=list(CASES.keys()), help='benchmark cases to run')
+    parser.add_argument('--baseline', default='dist/benchmark.json', help='JSON file with the stored baseline results')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed relative slowdown against the baseline before failing')
+    parser.add_argument('--update', action='store_true', help='store the results as the new baseline instead of comparing')
+    args = parser.parse_args()
+    results = {
+        name: profile(CASES[name])
+        for name in args.cases
+    }
+    if args.update or not os.path.exists(args.baseline):
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=4)
+        Logger.write(f'Done: baseline saved to {args.baseline}')
+        return
+    with open(args.baseline, encoding='utf-8') as file:
+        baseline = json.load(file)
+    regressions = compare(baseline, results, args.threshold)
+    for regression in regressions:
+        Logger.write(f'Regression: {regression}')
+    if len(regressions) > 0:
+        sys.exit(1)
+    Logger.write(f'Done: no regressions beyond {args.threshold:.0%}')
+
+def profile(case: dict[str, int]) -> dict[str, dict[str, float]]:
+    results = isolate(case, False)
+    for stage, traced in isolate(case, True).items():
+        if 'traced_peak_mb' in traced:
+            results[stage]['traced_peak_mb'] = traced['traced_peak_mb']
+    return results
+
+def isolate(case: dict[str, int], trace: bool) -> dict[str, dict[str, float]]:
+    with concurrent.futures.ProcessPoolExecutor(1) as executor:
+        return executor.submit(run, case, trace).result()
+
+def run(case: dict[str, int], trace: bool = False) -> dict[str, dict[str, float]]:
+    if trace:
+        tracemalloc.start()
+    level = Maze.generate(**case)
+    results = {}
+    start = begin()
+    crawler = Crawler(levels=[level])
+    crawler.run()
+    screens = crawler.screens
+    results['crawl'] = measure(start, screens=len(screens))
+    unpacked = [screen for screen, _ in screens.values()]
+    start = begin()
+    for screen in unpacked:
+        screen.get_hash()
+    results['hash'] = measure(start, hashes=len(unpacked))
+    start = begin()
+    composer = Composer(ASSETS, len(level[0]) + 6, len(level) + 2)
+    composer.prepare(len(screens))
+    presentation = composer.compose(screens)
+    results['compose'] = measure(start, slides=len(screens))
+    start = begin()
+    output = io.BytesIO()
+    Writer(output, presentation).save()
+    results['save'] = measure(start, slides=len(screens))
+    results['save']['bytes'] = len(output.getvalue())
+    if resource is not None:
+        results['process'] = {'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1 << 20 if sys.platform == 'darwin' else 1 << 10)}
+    return results
+
+def begin() -> float:
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    return time.perf_counter()
+
+def measure(start: float, **counts: int) -> dict[str, float]:
+    seconds = time.perf_counter() - start
+    result: dict[str, float] = {'seconds': seconds}
+    for name, count in counts.items():
+        result[name] = count
+        result[f'{name}_per_second'] = count / seconds if seconds > 0 else 0.0
+    if tracemalloc.is_tracing():
+        result['traced_peak_mb'] = tracemalloc.get_traced_memory()[1] / (1 << 20)
+    return result
+
+def compare(baseline: dict, results: dict, threshold: float) -> list[str]:
+    regressions = []
+    for name, stages in results.items():
+        for stage, result in stages.items():
+            if stage not in baseline.get(name, {}):
+                continue
+            for metric in ('seconds', 'traced_peak_mb', 'peak_rss_mb', 'bytes'):
+                if metric not in result or metric not in baseline[name][stage]:
+                    continue
+                previous = baseline[name][stage][metric]
+                limit = previous * (1 + threshold)
+                if metric == 'seconds':
+                    limit = max(limit, previous + TOLERANCE)
+                if result[metric] > limit:
+                    regressions.append(f'{name}.{stage}.{metric} {previous:.3f} => {result[metric]:.3f}')
+    return regressions
+
+TOLERANCE = 0.05
+
+CASES = {
+    'small': {'width': 11, 'height': 9, 'keys': 1, 'gems': 2, 'dragons': 0, 'loops': 4, 'seed': 0},
+    'medium': {'width': 15, 'height': 11, 'keys': 1, 'gems': 3, 'dragons': 1, 'loops': 8, 'seed': 0},
+}
+
+if __name__ == '__main__':
+    main()
@@ -1,29 +1,122 @@
+import argparse
 from model.enum.asset.message import Message
 from model.enum.asset.music import Music
 from model.enum.asset.sound import Sound
 from model.enum.button import Button
 from model.enum.cell import Cell
+from util.cache import Cache
+from util.checkpoint import Checkpoint
 from util.composer import Composer
 from util.crawler import Crawler
+from util.estimator import Estimator
+from util.graph import Graph
 from util.logger import Logger
+from util.metrics import Metrics
+from util.minimizer import Minimizer
+from util.optimizer import Optimizer
+from util.writer import Writer
 
 
 def main():
     # -m pip install types-lxml python-pptx
     # https://www.youtube.com/watch?v=SmYDGnwg4dA
     # https://docs.google.com/presentation/d/e/2PACX-1vRyCXoamwjJQ2_o-ugeYXrRm_ZXs7WZZP3BldGfEPfQ5SqXgXmRlUJAvpLuOYAtqSVRkX3hskZS-GzZ/pub?start=false&loop=false
-    crawler = Crawler(levels=LEVELS)
-    crawler.run()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--verify', action='store_true', help='check screen hashes for collisions while crawling')
+    parser.add_argument('--workers', type=int, default=1, help='number of processes used to expand each crawl frontier and to render direct slides')
+    parser.add_argument('--budget', type=int, help='memory budget in MB for crawled screens, spilling the rest to disk instead of capping the screen count')
+    parser.add_argument('--stream', action='store_true', help='write each slide to the presentation file as soon as it is composed')
+    parser.add_argument('--direct', action='store_true', help='stream slides rendered straight to XML instead of through python-pptx shapes')
+    parser.add_argument('--shard', type=int, help='split the presentation into linked files of at most this many slides each')
+    parser.add_argument('--compression', type=int, default=Writer.LEVEL, choices=range(10), metavar='LEVEL', help='deflate level from 0 to 9 for the XML parts of the presentation')
+    parser.add_argument('--estimate', action='store_true', help='only estimate the number of screens and the output size, without crawling')
+    parser.add_argument('--click-sounds', action='store_true', help='play sounds from the clicked buttons instead of slide transitions, so screens that only differ by sound share a slide')
+    parser.add_argument('--shared-dialogs', action='store_true', help='show dialogs that leave the game unchanged on one slide per message that returns to the last viewed slide, implies --click-sounds')
+    parser.add_argument('--minimize', action='store_true', help='merge equivalent screens before composing')
+    parser.add_argument('--dpi', type=int, help='resample images to their largest rendered size at this DPI and strip and recompress them')
+    parser.add_argument('--cache', type=int, help='size in MB of an on-disk cache of crawls and direct slides reused by later builds')
+    parser.add_argument('--checkpoint', help='directory where the crawl periodically saves its visited screens and frontier')
+    parser.add_argument('--resume', action='store_true', help='continue the crawl saved in the checkpoint directory')
+    parser.add_argument('--save-graph', metavar='PATH', help='write the crawled screen graph to this file in the binary graph format')
+    parser.add_argument('--load-graph', metavar='PATH', help='compose the screen graph stored in this file instead of crawling')
+    parser.add_argument('--report', help='write per-phase timings, counters and peak memory as JSON to this path')
+    parser.add_argument('--profile', action='store_true', help='run under cProfile and write the stats next to the report')
+    parser.add_argument('--trace', action='store_true', help='trace allocations with tracemalloc and include the top sites in the report')
+    args = parser.parse_args()
+    if args.resume and args.checkpoint is None:
+        parser.error('--resume requires --checkpoint')
+    if args.shared_dialogs and args.shard is not None:
+        parser.error('--shared-dialogs cannot be combined with --shard')
+    if args.shared_dialogs:
+        args.click_sounds = True
+    if (args.profile or args.trace) and args.report is None:
+        args.report = 'dist/metrics.json'
+    Metrics.enable(profile=args.profile, trace=args.trace)
+    cache = None if args.cache is None else Cache('dist/cache', args.cache << 20)
+    if args.load_graph is not None:
+        with Metrics.phase('load'):
+            screens = Graph.open(args.load_graph)
+            levels = screens.levels
+            Logger.write(f'Done: #{len(screens)} screens loaded from {args.load_graph}')
+    else:
+        levels = LEVELS
+        with Metrics.phase('estimate'):
+            estimators = [Estimator(level, ASSETS) for level in levels]
+            for estimator in estimators:
+                estimator.run()
+        estimate = 1 + sum(estimator.estimate for estimator in estimators)
+        for index, estimator in enumerate(estimators):
+            if estimator.exceeded:
+                Logger.write(f'Warning: level #{index} has more than {Estimator.LIMIT} level configurations, its estimate is only a lower bound')
+        if args.estimate or (args.budget is None and estimate > Crawler.LIMIT):
+            for index, estimator in enumerate(estimators):
+                Logger.write(f'Estimate: level #{index} ~#{estimator.slides} slides, ~{estimator.size >> 20} MB, {estimator.configurations} level configurations')
+                for position, cell, factor in estimator.hotspots[:5]:
+                    Logger.write(f'Hotspot: {cell} at {position.left},{position.top} multiplies configurations by {factor:.1f}')
+            if not args.estimate:
+                raise RuntimeError('Levels would exceed the screen limit, simplify them or pass --budget')
+            return
+        with Metrics.phase('crawl'):
+            checkpoint = None if args.checkpoint is None else Checkpoint(args.checkpoint)
+            crawler = Crawler(levels=levels, verify=args.verify, muted=args.click_sounds, shared=args.shared_dialogs, workers=args.workers, budget=None if args.budget is None else args.budget << 20, cache=cache, checkpoint=checkpoint)
+            if args.resume:
+                crawler.resume()
+            else:
+                crawler.run()
+            screens = crawler.screens
+    if args.minimize:
+        with Metrics.phase('minimize'):
+            minimizer = Minimizer(screens)
+            minimizer.run()
+            screens = minimizer.screens
+    if args.save_graph is not None:
+        with Metrics.phase('export'):
+            Graph.save(screens, levels, args.save_graph)
+            Logger.write(f'Done: #{len(screens)} screens saved to {args.save_graph}')
     composer = Composer(
         ASSETS,
-        len(LEVELS[0][0]) + 6,
-        len(LEVELS[0]) + 2,
+        len(levels[0][0]) + 6,
+        len(levels[0]) + 2,
+        click_sounds=args.click_sounds,
     )
-    composer.prepare(len(crawler.screens))
-    presentation = composer.compose(crawler.screens)
-    Logger.rewrite('Working: saving presentation')
-    presentation.save('dist/game.pptx')
+    if args.dpi is not None:
+        with Metrics.phase('optimize'):
+            composer.optimize(levels, Optimizer(args.dpi, cache))
+    if args.stream or args.direct or args.shard is not None:
+        with Metrics.phase('stream'):
+            composer.stream(screens, 'dist/game.pptx', direct=args.direct, workers=args.workers, cache=cache, shard=args.shard, level=args.compression)
+    else:
+        with Metrics.phase('prepare'):
+            composer.prepare(len(screens))
+        with Metrics.phase('compose'):
+            presentation = composer.compose(screens)
+        with Metrics.phase('save'):
+            Logger.rewrite('Working: saving presentation')
+            Writer('dist/game.pptx', presentation, args.compression).save()
     Logger.write('Done: presentation saved')
+    if args.report is not None:
+        Metrics.save(args.report)
+        Logger.write(f'Done: metrics saved to {args.report}')
 
 LEVELS = [
     [
@@ -69,6 +162,7 @@ ASSETS = {
     f'Message[{Message.DRAGON_BLOCK}]': 'You want me to move? No way. Maybe for 3 diamonds though!',
     f'Message[{Message.DRAGON_BRIBE}]': 'Niiiice, 3 diamonds. Yummy! You may proceed.',
     f'Message[{Message.PRINCESS_MESSAGE}]': 'You want to save me? Maybe for 3 diamonds.',
+    f'Message[{Message.PRINCESS_RESCUED}]': 'Ooh, 3 diamonds! My hero. On to the next castle!',
     f'Music[{Music.THEME}]': 'asset/menu/intro.mp3',
     f'Sound[{Sound.BUTTON_HIT}]': 'asset/menu/button.wav',
     f'Sound[{Sound.DOOR_HIT}]': 'asset/maze/door.wav',
@@ -3,9 +3,17 @@ import typing
 
 class Inventory:
 
-    def __init__(self, keys: int, gems: int):
-        self.__keys = keys
-        self.__gems = gems
+    __slots__ = ('__keys', '__gems')
+    __interned: dict[tuple[int, int], 'Inventory'] = {}
+
+    def __new__(cls, keys: int, gems: int) -> 'Inventory':
+        inventory = Inventory.__interned.get((keys, gems))
+        if inventory is None:
+            inventory = super().__new__(cls)
+            inventory.__keys = keys
+            inventory.__gems = gems
+            Inventory.__interned[(keys, gems)] = inventory
+        return inventory
 
     @property
     def keys(self) -> int:
@@ -20,3 +28,15 @@ class Inventory:
             keys=self.keys + (keys or 0),
             gems=self.gems + (gems or 0)
         )
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Inventory):
+            return self is other
+        else:
+            return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((self.keys, self.gems))
+
+    def __reduce__(self) -> tuple[type, tuple[int, int]]:
+        return Inventory, (self.keys, self.gems)
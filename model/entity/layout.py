@@ -0,0 +1,70 @@
+from model.entity.position import Position
+from model.enum.cell import Cell
+from util.zobrist import Zobrist
+
+
+class Layout:
+
+    CELLS = list(Cell)
+    BITS = len(CELLS).bit_length()
+    MASK = (1 << BITS) - 1
+    MUTABLE = [
+        Cell.KEY,
+        Cell.LOCK,
+        Cell.DOOR,
+        Cell.GEM,
+        Cell.DRAGON,
+    ]
+
+    def __init__(self, grid: list[list[Cell]], index: int = 0):
+        self.__index = index
+        self.__grid = tuple(
+            tuple(
+                Cell.SPACE if cell in Layout.MUTABLE else cell
+                for cell in line
+            )
+            for line in grid
+        )
+        self.__positions = tuple(
+            (left, top)
+            for top, line in enumerate(grid)
+            for left, cell in enumerate(line)
+            if cell in Layout.MUTABLE
+        )
+        self.__indices = {
+            position: index
+            for index, position in enumerate(self.__positions)
+        }
+        self.__key = Zobrist.get(Layout, index)
+        for top, line in enumerate(self.__grid):
+            for left, cell in enumerate(line):
+                if (left, top) not in self.__indices:
+                    self.__key ^= Zobrist.get(Layout, left, top, cell)
+
+    @property
+    def grid(self) -> tuple[tuple[Cell, ...], ...]:
+        return self.__grid
+
+    @property
+    def index(self) -> int:
+        return self.__index
+
+    @property
+    def positions(self) -> tuple[tuple[int, int], ...]:
+        return self.__positions
+
+    @property
+    def key(self) -> int:
+        return self.__key
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Layout):
+            return self is other or (self.index, self.grid, self.positions) == (other.index, other.grid, other.positions)
+        else:
+            return NotImplemented
+
+    def __hash__(self) -> int:
+        return self.key
+
+    def get_index(self, position: Position) -> None | int:
+        return self.__indices.get((position.left, position.top))
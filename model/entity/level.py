@@ -1,21 +1,100 @@
 import typing
+from model.entity.layout import Layout
 from model.entity.position import Position
 from model.enum.cell import Cell
+from util.zobrist import Zobrist
 
 
 class Level:
 
-    def __init__(self, grid: list[list[Cell]]):
-        self.__grid = grid
+    __slots__ = ('__layout', '__cells', '__key')
+
+    def __init__(self, layout: Layout, cells: int, key: int):
+        self.__layout = layout
+        self.__cells = cells
+        self.__key = key
+
+    @property
+    def layout(self) -> Layout:
+        return self.__layout
+
+    @property
+    def cells(self) -> int:
+        return self.__cells
 
     @property
     def grid(self) -> list[list[Cell]]:
-        return self.__grid
+        grid = [list(line) for line in self.__layout.grid]
+        for index, (left, top) in enumerate(self.__layout.positions):
+            grid[top][left] = self.__get_cell(index)
+        return grid
+
+    @property
+    def key(self) -> int:
+        return self.__key
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Level):
+            return self.cells == other.cells and self.layout == other.layout
+        else:
+            return NotImplemented
+
+    def __hash__(self) -> int:
+        return self.key
+
+    def get(self, position: Position) -> Cell:
+        index = self.__layout.get_index(position)
+        if index is None:
+            return self.__layout.grid[position.top][position.left]
+        else:
+            return self.__get_cell(index)
 
     def change(self, position: Position, replace: Cell) -> typing.Self:
+        index = self.__layout.get_index(position)
+        if index is None:
+            raise ValueError(f'Cannot change static cell at {position.left},{position.top}')
+        current = self.__get_cell(index)
+        shift = index * Layout.BITS
         return Level(
-            grid=[[
-                cell if (left, top) != position else replace
-                for left, cell in enumerate(line)
-            ] for top, line in enumerate(self.__grid)]
+            layout=self.__layout,
+            cells=self.__cells & ~(Layout.MASK << shift) | Layout.CELLS.index(replace) << shift,
+            key=self.__key ^ Level.__get_key(position.left, position.top, current) ^ Level.__get_key(position.left, position.top, replace)
         )
+
+    def get_bytes(self) -> bytes:
+        return ''.join(
+            ''.join(line)
+            for line in self.grid
+        ).encode()
+
+    def __get_cell(self, index: int) -> Cell:
+        return Layout.CELLS[self.__cells >> index * Layout.BITS & Layout.MASK]
+
+    @staticmethod
+    def create(grid: list[list[Cell]], index: int = 0) -> typing.Self:
+        layout = Layout(grid, index)
+        cells = 0
+        key = layout.key
+        for index, (left, top) in enumerate(layout.positions):
+            cells |= Layout.CELLS.index(grid[top][left]) << index * Layout.BITS
+            key ^= Level.__get_key(left, top, grid[top][left])
+        return Level(
+            layout=layout,
+            cells=cells,
+            key=key
+        )
+
+    @staticmethod
+    def restore(layout: Layout, cells: int) -> typing.Self:
+        key = layout.key
+        for index, (left, top) in enumerate(layout.positions):
+            key ^= Level.__get_key(left, top, Layout.CELLS[cells >> index * Layout.BITS & Layout.MASK])
+        return Level(
+            layout=layout,
+            cells=cells,
+            key=key
+        )
+
+    @staticmethod
+    def __get_key(left: int, top: int, cell: Cell) -> int:
+        return Zobrist.get(Level, left, top, cell)
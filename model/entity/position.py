@@ -3,9 +3,17 @@ import typing
 
 class Position:
 
-    def __init__(self, left: int, top: int):
-        self.__left = left
-        self.__top = top
+    __slots__ = ('__left', '__top')
+    __interned: dict[tuple[int, int], 'Position'] = {}
+
+    def __new__(cls, left: int, top: int) -> 'Position':
+        position = Position.__interned.get((left, top))
+        if position is None:
+            position = super().__new__(cls)
+            position.__left = left
+            position.__top = top
+            Position.__interned[(left, top)] = position
+        return position
 
     @property
     def left(self) -> int:
@@ -23,8 +31,14 @@ class Position:
 
     def __eq__(self, other: object) -> bool:
         if isinstance(other, Position):
-            return (self.left, self.top) == (other.left, other.top)
+            return self is other
         elif isinstance(other, tuple) and len(other) == 2 and all(isinstance(x, int) for x in other):
             return (self.left, self.top) == other
         else:
-            raise NotImplementedError()
+            return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((self.left, self.top))
+
+    def __reduce__(self) -> tuple[type, tuple[int, int]]:
+        return Position, (self.left, self.top)
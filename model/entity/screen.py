@@ -1,26 +1,28 @@
-import enum
-import hashlib
-import json
+import abc
 import typing
 from model.entity.position import Position
 from model.entity.state import State
+from model.enum.asset.message import Message
 from model.enum.asset.music import Music
 from model.enum.asset.sound import Sound
 from model.enum.button import Button
 from model.enum.effect import Effect
 from util.logic import Logic
+from util.zobrist import Zobrist
 
 
-class Screen:
+class Screen(abc.ABC):
 
-    def __init__(self, actions: list[Button], sound: Sound, music: Music, effect: Effect):
+    __slots__ = ('__actions', '__sound', '__music', '__effect')
+
+    def __init__(self, actions: tuple[Button, ...], sound: Sound, music: Music, effect: Effect):
         self.__actions = actions
         self.__sound = sound
         self.__music = music
         self.__effect = effect
 
     @property
-    def actions(self) -> list[Button]:
+    def actions(self) -> tuple[Button, ...]:
         return self.__actions
 
     @property
@@ -35,45 +37,53 @@ class Screen:
     def effect(self) -> Effect:
         return self.__effect
 
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Screen):
+            return type(self) is type(other) and (self.sound, self.music, self.effect) == (other.sound, other.music, other.effect)
+        else:
+            return NotImplemented
+
+    def __hash__(self) -> int:
+        return self.get_hash()
+
     def handle(self, button: Button) -> None | typing.Self:
         if button in self.__actions:
             raise NotImplementedError(f'Button {button} not handled on this screen')
         else:
             raise ValueError(f'Button {button} not supported on this screen')
 
-    def get_hash(self) -> str:
-        sponge = Screen.__get_dict(self)
-        sponge = json.dumps(sponge, sort_keys=True).encode()
-        sponge = hashlib.sha256(sponge)
-        return sponge.hexdigest()
-
-    @staticmethod
-    def __get_dict(obj: object) -> object:
-        if isinstance(obj, (bool, int, float, str)):
-            return obj
-        if isinstance(obj, enum.Enum):
-            return obj.value
-        if isinstance(obj, (list, tuple)):
-            return [
-                Screen.__get_dict(item)
-                for item in obj
-            ]
-        if isinstance(obj, dict):
-            return {
-                key: Screen.__get_dict(value)
-                for key, value in obj.items()
-                if key != '_Screen__actions'
-            }
-        if hasattr(obj, '__dict__'):
-            return Screen.__get_dict(vars(obj))
-        raise TypeError(f'Cannot dictify {obj}')
+    @abc.abstractmethod
+    def mute(self) -> typing.Self:
+        pass
+
+    def get_hash(self) -> int:
+        return Zobrist.get(Screen, self.__class__.__name__, self.sound, self.music, self.effect)
+
+    def get_view(self) -> tuple:
+        return (
+            self.__class__.__name__,
+            self.sound,
+            self.music,
+            self.effect,
+        )
+
+    def get_bytes(self) -> bytes:
+        return '|'.join([
+            self.__class__.__name__,
+            self.sound,
+            self.music,
+            self.effect,
+        ]).encode()
 
 class MainScreen(Screen):
 
+    __slots__ = ('__levels',)
+    ACTIONS = (
+        Button.PLAY,
+    )
+
     def __init__(self, levels: list[list[str]]):
-        super().__init__([
-            Button.PLAY,
-        ], Sound.NONE, Music.THEME, Effect.NONE)
+        super().__init__(MainScreen.ACTIONS, Sound.NONE, Music.THEME, Effect.NONE)
         self.__levels = levels
 
     @property
@@ -82,22 +92,52 @@ class MainScreen(Screen):
 
     def handle(self, button: Button) -> None | typing.Self:
         if button == Button.PLAY:
-            state = State.create(self.levels[0])
-            return MazeScreen(Sound.BUTTON_HIT, MazeScreen.EFFECT, state)
+            return self.enter(0)
         else:
             super().handle(button)
 
+    def __eq__(self, other: object) -> bool:
+        return super().__eq__(other) is True and self.levels == other.levels
+
+    def __hash__(self) -> int:
+        return self.get_hash()
+
+    def mute(self) -> typing.Self:
+        return self
+
+    def enter(self, index: int) -> 'MazeScreen':
+        state = State.create(self.levels[index], index)
+        return MazeScreen(Sound.BUTTON_HIT, MazeScreen.EFFECT, state)
+
+    def get_bytes(self) -> bytes:
+        return b'|'.join([
+            super().get_bytes(),
+            '\n'.join(
+                ''.join(level)
+                for level in self.levels
+            ).encode(),
+        ])
+
 class MazeScreen(Screen):
 
+    __slots__ = ('__state',)
+    ACTIONS = (
+        Button.UP,
+        Button.DOWN,
+        Button.LEFT,
+        Button.RIGHT,
+    )
+    MOVES = {
+        Button.UP: Position(0, -1),
+        Button.DOWN: Position(0, 1),
+        Button.LEFT: Position(-1, 0),
+        Button.RIGHT: Position(1, 0),
+    }
     EFFECT = Effect.FADE
+    RADIUS = 3
 
     def __init__(self, sound: Sound, effect: Effect, state: State):
-        super().__init__([
-            Button.UP,
-            Button.DOWN,
-            Button.LEFT,
-            Button.RIGHT,
-        ], sound, Music.NONE, effect)
+        super().__init__(MazeScreen.ACTIONS, sound, Music.NONE, effect)
         self.__state = state
 
     @property
@@ -105,17 +145,14 @@ class MazeScreen(Screen):
         return self.__state
 
     def handle(self, button: Button) -> None | typing.Self:
-        if button == Button.UP:
-            return self.__move(Position(0, -1))
-        elif button == Button.DOWN:
-            return self.__move(Position(0, 1))
-        elif button == Button.LEFT:
-            return self.__move(Position(-1, 0))
-        elif button == Button.RIGHT:
-            return self.__move(Position(1, 0))
+        if button in MazeScreen.MOVES:
+            return self.__move(MazeScreen.MOVES[button])
         else:
             super().handle(button)
 
+    def mute(self) -> typing.Self:
+        return MazeScreen(Sound.NONE, self.effect, self.state)
+
     def __move(self, change: Position) -> None | typing.Self:
         next_state = self.state.change(
             position=change
@@ -126,14 +163,34 @@ class MazeScreen(Screen):
         else:
             return MazeScreen(sound, MazeScreen.EFFECT, state)
 
+    def __eq__(self, other: object) -> bool:
+        return super().__eq__(other) is True and self.state == other.state
+
+    def __hash__(self) -> int:
+        return self.get_hash()
+
+    def get_hash(self) -> int:
+        return super().get_hash() ^ self.state.key
+
+    def get_view(self) -> tuple:
+        return super().get_view() + self.state.get_view(MazeScreen.RADIUS)
+
+    def get_bytes(self) -> bytes:
+        return b'|'.join([
+            super().get_bytes(),
+            self.state.get_bytes(),
+        ])
+
 class DialogScreen(Screen):
 
+    __slots__ = ('__state', '__message')
+    ACTIONS = (
+        Button.CLOSE,
+    )
     EFFECT = Effect.WIPE_UP
 
-    def __init__(self, sound: Sound, state: State, message: str):
-        super().__init__([
-            Button.CLOSE
-        ], sound, Music.NONE, DialogScreen.EFFECT)
+    def __init__(self, sound: Sound, state: State, message: Message):
+        super().__init__(DialogScreen.ACTIONS, sound, Music.NONE, DialogScreen.EFFECT)
         self.__state = state
         self.__message = message
 
@@ -142,11 +199,80 @@ class DialogScreen(Screen):
         return self.__state
 
     @property
-    def message(self) -> str:
+    def message(self) -> Message:
         return self.__message
 
     def handle(self, button: Button) -> None | typing.Self:
-        if button == Button.CLOSE:
+        if button == Button.CLOSE and self.message == Message.PRINCESS_RESCUED:
+            return None
+        elif button == Button.CLOSE:
             return MazeScreen(Sound.BUTTON_HIT, DialogScreen.EFFECT, self.state)
         else:
             super().handle(button)
+
+    def mute(self) -> typing.Self:
+        return DialogScreen(Sound.NONE, self.state, self.message)
+
+    def share(self, origin: Screen) -> Screen:
+        closed = self.handle(Button.CLOSE)
+        if isinstance(origin, MazeScreen) and isinstance(closed, MazeScreen) and closed.state == origin.state:
+            return MessageScreen(self.sound, self.message)
+        return self
+
+    def __eq__(self, other: object) -> bool:
+        return super().__eq__(other) is True and (self.state, self.message) == (other.state, other.message)
+
+    def __hash__(self) -> int:
+        return self.get_hash()
+
+    def get_hash(self) -> int:
+        return super().get_hash() ^ self.state.key ^ Zobrist.get(Message, self.message)
+
+    def get_view(self) -> tuple:
+        return super().get_view() + self.state.get_view(MazeScreen.RADIUS) + (self.message,)
+
+    def get_bytes(self) -> bytes:
+        return b'|'.join([
+            super().get_bytes(),
+            self.state.get_bytes(),
+            self.message.encode(),
+        ])
+
+class MessageScreen(Screen):
+
+    __slots__ = ('__message',)
+
+    def __init__(self, sound: Sound, message: Message):
+        super().__init__(DialogScreen.ACTIONS, sound, Music.NONE, DialogScreen.EFFECT)
+        self.__message = message
+
+    @property
+    def message(self) -> Message:
+        return self.__message
+
+    def handle(self, button: Button) -> None | typing.Self:
+        if button == Button.CLOSE:
+            return self
+        else:
+            super().handle(button)
+
+    def mute(self) -> typing.Self:
+        return MessageScreen(Sound.NONE, self.message)
+
+    def __eq__(self, other: object) -> bool:
+        return super().__eq__(other) is True and self.message == other.message
+
+    def __hash__(self) -> int:
+        return self.get_hash()
+
+    def get_hash(self) -> int:
+        return super().get_hash() ^ Zobrist.get(Message, self.message)
+
+    def get_view(self) -> tuple:
+        return super().get_view() + (self.message,)
+
+    def get_bytes(self) -> bytes:
+        return b'|'.join([
+            super().get_bytes(),
+            self.message.encode(),
+        ])
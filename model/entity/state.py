@@ -3,14 +3,18 @@ from model.entity.inventory import Inventory
 from model.entity.level import Level
 from model.entity.position import Position
 from model.enum.cell import Cell
+from util.zobrist import Zobrist
 
 
 class State:
 
+    __slots__ = ('__level', '__position', '__inventory', '__key')
+
     def __init__(self, level: Level, position: Position, inventory: Inventory):
         self.__level = level
         self.__position = position
         self.__inventory = inventory
+        self.__key = level.key ^ Zobrist.get(Position, position.left, position.top) ^ Zobrist.get(Inventory, inventory.keys, inventory.gems)
 
     @property
     def level(self) -> Level:
@@ -24,22 +28,58 @@ class State:
     def inventory(self) -> Inventory:
         return self.__inventory
 
+    @property
+    def key(self) -> int:
+        return self.__key
+
     def change(self, level: None | Level = None, position: None | Position = None, inventory: None | Inventory = None) -> typing.Self:
         return State(
             level=self.level if level is None else level,
-            position=self.position + (position or Position(0, 0)),
+            position=self.position if position is None else self.position + position,
             inventory=self.inventory if inventory is None else inventory
         )
 
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, State):
+            return self.position is other.position and self.inventory is other.inventory and self.level == other.level
+        else:
+            return NotImplemented
+
+    def __hash__(self) -> int:
+        return self.key
+
+    def get_bytes(self) -> bytes:
+        return b'|'.join([
+            self.level.get_bytes(),
+            f'{self.position.left},{self.position.top}'.encode(),
+            f'{self.inventory.keys},{self.inventory.gems}'.encode(),
+        ])
+
+    def get_view(self, radius: int) -> tuple:
+        grid = self.level.layout.grid
+        return (
+            len(grid),
+            len(grid[0]),
+            self.position.left,
+            self.position.top,
+            self.inventory.keys,
+            self.inventory.gems,
+            tuple(
+                self.level.get(Position(left, top))
+                for top in range(max(0, self.position.top - radius), min(len(grid), self.position.top + radius + 1))
+                for left in range(max(0, self.position.left - radius), min(len(grid[top]), self.position.left + radius + 1))
+            ),
+        )
+
     @staticmethod
-    def create(level: list[str]) -> typing.Self:
+    def create(level: list[str], index: int = 0) -> typing.Self:
         grid = [[
             Cell(cell)
             for cell in State.__grapheme_split(line)
         ] for line in level]
         grid, position = State.__extract_cell(grid, Cell.WIZARD, Cell.SPACE)
         return State(
-            level=Level(grid=grid),
+            level=Level.create(grid, index),
             position=position,
             inventory=Inventory(keys=0, gems=0)
         )
@@ -9,3 +9,4 @@ class Message(enum.StrEnum):
     DRAGON_BRIBE = 'DRAGON_BRIBE'
 
     PRINCESS_MESSAGE = 'PRINCESS_MESSAGE'
+    PRINCESS_RESCUED = 'PRINCESS_RESCUED'
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+from generate import LEVELS
+from util.checkpoint import Checkpoint
+from util.crawler import Crawler
+from util.maze import Maze
+
+
+class Interrupted(Exception):
+    pass
+
+
+class InterruptedCheckpoint(Checkpoint):
+
+    def __init__(self, path: str, saves: int):
+        super().__init__(path, 0)
+        self.__saves = saves
+
+    def save(self, frame: object, state: object) -> None:
+        super().save(frame, state)
+        self.__saves -= 1
+        if self.__saves == 0:
+            raise Interrupted()
+
+
+class CheckpointTest(unittest.TestCase):
+
+    LEVELS = [LEVELS[0], Maze.generate(9, 7, keys=1, gems=3, dragons=1, loops=2, seed=1)]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = directory.name
+
+    def test_frames(self):
+        checkpoint = Checkpoint(self.path)
+        self.assertIsNone(checkpoint.load())
+        checkpoint.save('first', 1)
+        checkpoint.save('second', 2)
+        checkpoint.wait()
+        with open(os.path.join(self.path, 'frames.bin'), 'ab') as file:
+            file.write(b'partial frame')
+        frames, state = Checkpoint(self.path).load()
+        self.assertEqual(list(frames), ['first', 'second'])
+        self.assertEqual(state, 2)
+
+    def test_resume(self):
+        for budget in (None, 1 << 16):
+            reference = self.__crawl(budget=budget)
+            for saves in (1, 2, 5, 20):
+                with self.subTest(budget=budget, saves=saves):
+                    self.assertEqual(self.__resume(saves, budget=budget), reference)
+
+    def test_resume_levels(self):
+        reference = self.__crawl()
+        for saves in (1, 2, 3):
+            with self.subTest(saves=saves):
+                self.assertEqual(self.__resume(saves, workers=2), reference)
+
+    def test_mismatch(self):
+        self.__resume(2)
+        for options in ({'muted': True}, {'shared': True}):
+            with self.subTest(**options), self.assertRaises(RuntimeError):
+                Crawler(CheckpointTest.LEVELS, checkpoint=Checkpoint(self.path, 0), **options).resume()
+        with self.assertRaises(RuntimeError):
+            Crawler(CheckpointTest.LEVELS[:1], checkpoint=Checkpoint(self.path, 0)).resume()
+
+    def __crawl(self, **options) -> bytes:
+        crawler = Crawler(CheckpointTest.LEVELS, **options)
+        crawler.run()
+        return bytes(crawler.screens.buffer[:])
+
+    def __resume(self, saves: int, **options) -> bytes:
+        checkpoint = InterruptedCheckpoint(self.path, saves)
+        with self.assertRaises(Interrupted):
+            Crawler(CheckpointTest.LEVELS, checkpoint=checkpoint, **options).run()
+        checkpoint.wait()
+        crawler = Crawler(CheckpointTest.LEVELS, checkpoint=Checkpoint(self.path, 0), **options)
+        crawler.resume()
+        return bytes(crawler.screens.buffer[:])
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+import unittest.mock
+from generate import LEVELS
+from model.entity.screen import DialogScreen, MainScreen, MazeScreen, MessageScreen
+from model.enum.button import Button
+from util.crawler import Crawler
+from util.graph import Graph
+from util.maze import Maze
+
+
+class GraphTest(unittest.TestCase):
+
+    LEVELS = [LEVELS[0], Maze.generate(9, 7, keys=1, gems=3, dragons=1, loops=2, seed=1)]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'graph.bin')
+
+    def test_round_trip(self):
+        crawler = Crawler(GraphTest.LEVELS, shared=True)
+        crawler.run()
+        screens = {
+            screen_hash: crawler.screens[screen_hash]
+            for screen_hash in crawler.screens
+        }
+        self.assertEqual(
+            {type(screen) for screen, _ in screens.values()},
+            {MainScreen, MazeScreen, DialogScreen, MessageScreen},
+        )
+        Graph.save(screens, GraphTest.LEVELS, self.path)
+        graph = Graph.open(self.path)
+        self.addCleanup(graph.close)
+        self.assertEqual(graph.levels, GraphTest.LEVELS)
+        self.assertEqual(len(graph), len(screens))
+        self.assertEqual(list(graph), list(screens))
+        for screen_hash, (screen, actions) in screens.items():
+            self.assertIn(screen_hash, graph)
+            loaded, loaded_actions = graph[screen_hash]
+            self.assertIs(type(loaded), type(screen))
+            self.assertEqual(loaded, screen)
+            self.assertEqual(loaded.get_hash(), screen_hash)
+            self.assertEqual(loaded.get_bytes(), screen.get_bytes())
+            self.assertEqual((loaded.sound, loaded.music, loaded.effect), (screen.sound, screen.music, screen.effect))
+            if isinstance(screen, (MazeScreen, DialogScreen)):
+                self.assertEqual(loaded.state.position, screen.state.position)
+                self.assertEqual(loaded.state.inventory, screen.state.inventory)
+                self.assertEqual(loaded.state.level.cells, screen.state.level.cells)
+                self.assertEqual(loaded.state.level.layout, screen.state.level.layout)
+            if isinstance(screen, (DialogScreen, MessageScreen)):
+                self.assertEqual(loaded.message, screen.message)
+            self.assertEqual(loaded_actions, actions)
+        self.assertNotIn(0, graph)
+        with self.assertRaises(KeyError):
+            graph[0]
+
+    def test_edges(self):
+        crawler = Crawler(GraphTest.LEVELS)
+        crawler.run()
+        edges = crawler.screens.edges
+        self.assertEqual(edges.shape, (len(crawler.screens), len(Graph.BUTTONS)))
+        for index, (_, actions) in enumerate(crawler.screens.values()):
+            for button, screen_hash in actions.items():
+                self.assertEqual(crawler.screens.get_hash(edges[index, Graph.COLUMNS[button]]), screen_hash)
+
+    def test_graph_buffer(self):
+        crawler = Crawler(GraphTest.LEVELS)
+        crawler.run()
+        Graph.save(crawler.screens, GraphTest.LEVELS, self.path)
+        with open(self.path, 'rb') as file:
+            self.assertEqual(file.read(), bytes(crawler.screens.buffer))
+
+    def test_write(self):
+        memory = Crawler(GraphTest.LEVELS)
+        memory.run()
+        with unittest.mock.patch.object(Graph, 'CHUNK', 100):
+            spilled = Crawler(GraphTest.LEVELS, budget=1 << 16)
+            spilled.run()
+        self.assertEqual(bytes(spilled.screens.buffer[:]), bytes(memory.screens.buffer))
+
+    def test_twin_levels(self):
+        first = ['🧱🧱🧱🧱🧱🧱🧱🧱', '🧱🧙💎💎💎⬛🤴🧱', '🧱🧱🧱🧱🧱🧱🧱🧱']
+        second = ['🧱🧱🧱🧱🧱🧱🧱🧱', '🧱⬛💎💎💎🧙🤴🧱', '🧱🧱🧱🧱🧱🧱🧱🧱']
+        levels = [first, second]
+        crawler = Crawler(levels)
+        crawler.run()
+        Graph.save(crawler.screens, levels, self.path)
+        graph = Graph.open(self.path)
+        self.addCleanup(graph.close)
+        screen_hash = MainScreen(levels).enter(1).get_hash()
+        for button in [Button.LEFT] * 4 + [Button.RIGHT] * 5 + [Button.CLOSE]:
+            screen_hash = graph[screen_hash][1][button]
+        self.assertIsInstance(graph[screen_hash][0], MainScreen)
+
+    def test_version(self):
+        crawler = Crawler(GraphTest.LEVELS)
+        crawler.run()
+        blob = bytearray(crawler.screens.buffer)
+        blob[8] += 1
+        with self.assertRaises(ValueError):
+            Graph(bytes(blob))
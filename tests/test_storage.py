@@ -0,0 +1,53 @@
+import os
+import tempfile
+import tracemalloc
+import unittest
+from util.storage import Storage
+
+
+class StorageTest(unittest.TestCase):
+
+    def test_grow(self):
+        storage = Storage(1 << 20)
+        self.addCleanup(storage.close)
+        keys = [index * 0x9E3779B97F4A7C15 % (1 << 64) for index in range(40000)]
+        for index, key in enumerate(keys):
+            storage[key] = index
+        self.assertEqual(len(storage), len(keys))
+        self.assertEqual(list(storage), keys)
+        for index, key in enumerate(keys):
+            self.assertEqual(storage[key], index)
+        storage[keys[0]] = 'replaced'
+        self.assertEqual(len(storage), len(keys))
+        self.assertEqual(storage[keys[0]], 'replaced')
+        self.assertNotIn(1, storage)
+        self.assertNotIn('key', storage)
+        with self.assertRaises(KeyError):
+            storage[1]
+
+    def test_evict(self):
+        storage = Storage(256)
+        self.addCleanup(storage.close)
+        for key in range(200):
+            storage[key] = bytes([key]) * 64
+        for key in reversed(range(200)):
+            self.assertEqual(storage[key], bytes([key]) * 64)
+
+    def test_budget(self):
+        storage = Storage(1 << 16)
+        self.addCleanup(storage.close)
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        start = tracemalloc.get_traced_memory()[0]
+        for key in range(50000):
+            storage[key * 0x9E3779B97F4A7C15 % (1 << 64)] = key << 40
+        self.assertLess(tracemalloc.get_traced_memory()[0] - start, 2 << 16)
+
+    def test_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'storage')
+            storage = Storage(64, path)
+            storage[1] = 'value'
+            self.assertEqual(storage.path, path)
+            self.assertTrue(os.path.isfile(os.path.join(path, 'records.bin')))
+            storage.close()
@@ -0,0 +1,39 @@
+import io
+import unittest
+import unittest.mock
+import zipfile
+import pptx
+from util.writer import Writer
+
+
+class WriterTest(unittest.TestCase):
+
+    def test_save(self):
+        blob = self.__save(3)
+        self.assertNotIn(b'PK\x06\x06', blob)
+        with zipfile.ZipFile(io.BytesIO(blob)) as archive:
+            self.assertIsNone(archive.testzip())
+        self.assertEqual(len(pptx.Presentation(io.BytesIO(blob)).slides), 3)
+
+    def test_zip64(self):
+        with unittest.mock.patch.object(zipfile, 'ZIP64_LIMIT', 2000), unittest.mock.patch.object(zipfile, 'ZIP_FILECOUNT_LIMIT', 10):
+            blob = self.__save(3)
+        self.assertIn(b'PK\x06\x06', blob)
+        self.assertIn(b'PK\x06\x07', blob)
+        with zipfile.ZipFile(io.BytesIO(blob)) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertGreater(len(archive.infolist()), 10)
+            self.assertTrue(any(info.file_size >= 2000 for info in archive.infolist()))
+        self.assertEqual(len(pptx.Presentation(io.BytesIO(blob)).slides), 3)
+
+    def test_workers(self):
+        self.assertEqual(self.__save(3, workers=1), self.__save(3, workers=4))
+
+    @staticmethod
+    def __save(slides: int, workers: None | int = None) -> bytes:
+        presentation = pptx.Presentation()
+        for _ in range(slides):
+            presentation.slides.add_slide(presentation.slide_layouts[6])
+        output = io.BytesIO()
+        Writer(output, presentation, workers=workers).save()
+        return output.getvalue()
@@ -0,0 +1,76 @@
+import hashlib
+import os
+import tempfile
+
+
+class Cache:
+
+    VERSION = 1
+
+    def __init__(self, path: str, budget: int):
+        self.__path = path
+        self.__budget = budget
+        self.__size = 0
+        os.makedirs(self.__path, exist_ok=True)
+        for _, size, _ in self.__entries():
+            self.__size += size
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    @property
+    def size(self) -> int:
+        return self.__size
+
+    def get(self, layer: str, key: str) -> None | bytes:
+        path = self.__locate(layer, key)
+        try:
+            with open(path, 'rb') as file:
+                blob = file.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return blob
+
+    def put(self, layer: str, key: str, blob: bytes) -> None:
+        path = self.__locate(layer, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            self.__size -= os.path.getsize(path)
+        handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(handle, 'wb') as file:
+            file.write(blob)
+        os.replace(temporary, path)
+        self.__size += len(blob)
+        if self.__size > self.__budget:
+            self.__evict()
+
+    def __evict(self) -> None:
+        for _, size, path in sorted(self.__entries()):
+            if self.__size <= self.__budget * 3 // 4:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.__size -= size
+
+    def __entries(self) -> list[tuple[float, int, str]]:
+        entries = []
+        for directory, _, names in os.walk(self.__path):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def __locate(self, layer: str, key: str) -> str:
+        return os.path.join(self.__path, layer, key[:2], key)
+
+    @staticmethod
+    def digest(*parts: object) -> str:
+        return hashlib.sha256(repr((Cache.VERSION,) + parts).encode()).hexdigest()
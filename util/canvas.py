@@ -0,0 +1,347 @@
+import abc
+import functools
+import os
+import typing
+import xml.sax.saxutils
+import lxml.etree # type: ignore
+import pptx, pptx.dml.color, pptx.enum.text, pptx.opc.constants, pptx.opc.package, pptx.opc.packuri, pptx.oxml.ns, pptx.oxml.slide, pptx.shapes.picture, pptx.slide, pptx.util
+from model.enum.effect import Effect
+
+
+class Canvas(abc.ABC):
+
+    @abc.abstractmethod
+    def add_picture(self, image: str, left: float, top: float, width: float, height: float) -> typing.Any:
+        pass
+
+    @abc.abstractmethod
+    def set_transparency(self, picture: typing.Any, transparency: float) -> None:
+        pass
+
+    @abc.abstractmethod
+    def add_text(self, text: str, left: float, top: float, width: float, height: float, font: str, size: int, color: tuple[int, int, int]) -> None:
+        pass
+
+    @abc.abstractmethod
+    def add_music(self, music: str, left: float, top: float, width: float, height: float) -> None:
+        pass
+
+    @abc.abstractmethod
+    def add_transition(self, sound: None | str, effect: Effect) -> None:
+        pass
+
+    @abc.abstractmethod
+    def add_link(self, picture: typing.Any, link: int | tuple[str, int], sound: None | str = None) -> None:
+        pass
+
+    @abc.abstractmethod
+    def add_return(self, picture: typing.Any, sound: None | str = None) -> None:
+        pass
+
+    @abc.abstractmethod
+    def get_blob(self) -> bytes:
+        pass
+
+    @abc.abstractmethod
+    def get_shape_count(self) -> int:
+        pass
+
+    @abc.abstractmethod
+    def get_rels(self) -> list[tuple[str, str, str]]:
+        pass
+
+    @staticmethod
+    def get_transition_xml(audio_id: None | str, effect: Effect) -> str:
+        sound_xml = ''
+        if audio_id is not None:
+            sound_xml = f'''
+                <p:sndAc>
+                    <p:stSnd>
+                        <p:snd r:embed="{audio_id}" name="media{audio_id}.wav"/>
+                    </p:stSnd>
+                </p:sndAc>
+            '''
+        effect_xml = ''
+        if effect != Effect.NONE:
+            if effect == Effect.FADE:
+                effect_xml = '<p:fade/>'
+            elif effect == Effect.WIPE_UP:
+                effect_xml = '<p:wipe dir="u"/>'
+            else:
+                raise ValueError(f'Unhandled effect {effect}')
+        return f'''
+            <root
+                xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"
+                xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+                xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"
+                xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"
+                xmlns:p14="http://schemas.microsoft.com/office/powerpoint/2010/main"
+            >
+                <mc:AlternateContent>
+                    <mc:Choice Requires="p14">
+                        <p:transition advClick="0" p14:dur="100">
+                            {effect_xml}
+                            {sound_xml}
+                        </p:transition>
+                    </mc:Choice>
+                    <mc:Fallback>
+                        <p:transition advClick="0">
+                            {effect_xml}
+                            {sound_xml}
+                        </p:transition>
+                    </mc:Fallback>
+                </mc:AlternateContent>
+            </root>
+        '''
+
+    @staticmethod
+    def get_transition_element(audio_id: None | str, effect: Effect) -> lxml.etree._Element:
+        content_element = lxml.etree.fromstring(Canvas.get_transition_xml(audio_id, effect))
+        return content_element.xpath('.//mc:AlternateContent', namespaces=content_element.nsmap)[0]
+
+class SlideCanvas(Canvas):
+
+    def __init__(self, slide: pptx.slide.Slide, resolve: typing.Callable[[str], pptx.opc.package.Part], slides: None | pptx.slide.Slides = None):
+        self.__slide = slide
+        self.__resolve = resolve
+        self.__slides = slides
+
+    @property
+    def slide(self) -> pptx.slide.Slide:
+        return self.__slide
+
+    def add_picture(self, image: str, left: float, top: float, width: float, height: float) -> pptx.shapes.picture.Picture:
+        part = self.__resolve(image)
+        rId = self.__slide.part.relate_to(part, pptx.opc.constants.RELATIONSHIP_TYPE.IMAGE)
+        element = self.__slide.shapes._add_pic_from_image_part(part, rId, left, top, width, height)
+        return pptx.shapes.picture.Picture(element, self.__slide.shapes)
+
+    def set_transparency(self, picture: pptx.shapes.picture.Picture, transparency: float) -> None:
+        blip = picture.element.blipFill.blip
+        blip.insert(
+            0,
+            lxml.etree.Element(
+                '{http://schemas.openxmlformats.org/drawingml/2006/main}alphaModFix',
+                {'amt': str(int(transparency * 100000))}
+            )
+        )
+
+    def add_text(self, text: str, left: float, top: float, width: float, height: float, font: str, size: int, color: tuple[int, int, int]) -> None:
+        textbox = self.__slide.shapes.add_textbox(left, top, width, height).text_frame
+        textbox.text = text
+        textbox.word_wrap = True
+        textbox.vertical_anchor = pptx.enum.text.MSO_ANCHOR.MIDDLE
+        textbox.paragraphs[0].alignment = pptx.enum.text.PP_ALIGN.CENTER
+        textbox.paragraphs[0].font.name = font
+        textbox.paragraphs[0].font.size = pptx.util.Pt(size)
+        textbox.paragraphs[0].font.color.rgb = pptx.dml.color.RGBColor(*color)
+
+    def add_music(self, music: str, left: float, top: float, width: float, height: float) -> None:
+        media = self.__slide.shapes.add_movie(
+            music,
+            left,
+            top,
+            width,
+            height,
+            None,
+            mime_type='audio/mp3'
+        )
+        media_id = media.element.xpath('.//p:cNvPr')[0].attrib['id']
+        anchor_node = media.element.getparent().getparent().getparent().xpath(f'.//p:timing//p:video//p:spTgt[@spid="{media_id}"]')[0]
+        media_node = anchor_node.getparent().getparent()
+        media_node.set('numSld', '999999')
+        element = media_node.xpath('.//p:cTn', namespaces=media_node.nsmap)[0]
+        element.set('repeatCount', 'indefinite')
+        element = media_node.xpath('.//p:cond', namespaces=media_node.nsmap)[0]
+        element.set('delay', '0')
+
+    def add_transition(self, sound: None | str, effect: Effect) -> None:
+        audio_id = None
+        if sound is not None:
+            audio_id = self.__slide.part.relate_to(self.__resolve(sound), pptx.opc.constants.RELATIONSHIP_TYPE.AUDIO)
+        self.__slide.element.insert(-1, Canvas.get_transition_element(audio_id, effect))
+
+    def add_link(self, picture: pptx.shapes.picture.Picture, link: int | tuple[str, int], sound: None | str = None) -> None:
+        audio_id = None
+        if sound is not None:
+            audio_id = self.__slide.part.relate_to(self.__resolve(sound), pptx.opc.constants.RELATIONSHIP_TYPE.AUDIO)
+        if self.__slides is not None and isinstance(link, int):
+            picture.click_action.target_slide = self.__slides[link]
+            hlink = picture.element.nvPicPr.cNvPr.hlinkClick
+        else:
+            hlink = picture.element.nvPicPr.cNvPr.get_or_add_hlinkClick()
+            if isinstance(link, int):
+                hlink.action = 'ppaction://hlinksldjump'
+                hlink.rId = self.__slide.part.rels.get_or_add_ext_rel(pptx.opc.constants.RELATIONSHIP_TYPE.SLIDE, f'slide{link + 1}.xml')
+            else:
+                hlink.action = f'ppaction://hlinkpres?slideindex={link[1] + 1}&slidetitle='
+                hlink.rId = self.__slide.part.rels.get_or_add_ext_rel(pptx.opc.constants.RELATIONSHIP_TYPE.HYPERLINK, link[0])
+        if audio_id is not None:
+            lxml.etree.SubElement(hlink, pptx.oxml.ns.qn('a:snd'), {
+                pptx.oxml.ns.qn('r:embed'): audio_id,
+                'name': os.path.basename(sound),
+            })
+
+    def add_return(self, picture: pptx.shapes.picture.Picture, sound: None | str = None) -> None:
+        hlink = picture.element.nvPicPr.cNvPr.get_or_add_hlinkClick()
+        hlink.action = 'ppaction://hlinkshowjump?jump=lastslideviewed'
+        hlink.rId = ''
+        if sound is not None:
+            lxml.etree.SubElement(hlink, pptx.oxml.ns.qn('a:snd'), {
+                pptx.oxml.ns.qn('r:embed'): self.__slide.part.relate_to(self.__resolve(sound), pptx.opc.constants.RELATIONSHIP_TYPE.AUDIO),
+                'name': os.path.basename(sound),
+            })
+
+    def get_blob(self) -> bytes:
+        return self.__slide.part.blob
+
+    def get_shape_count(self) -> int:
+        return len(self.__slide.shapes)
+
+    def get_rels(self) -> list[tuple[str, str, str]]:
+        return [
+            (rel.rId, rel.reltype, rel.target_ref)
+            for rel in self.__slide.part.rels.values()
+        ]
+
+class XmlCanvas(Canvas):
+
+    BASE_URI = '/ppt/slides'
+    HEADER = '''<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n'''
+    SLIDE = (
+        '<p:sld xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<p:cSld><p:spTree><p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr><p:grpSpPr/>{shapes}</p:spTree></p:cSld>'
+        '{transition}<p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sld>'
+    )
+    PICTURE = (
+        '<p:pic><p:nvPicPr><p:cNvPr id="{id}" name="Picture {name}" descr="{descr}"{link}<p:cNvPicPr><a:picLocks noChangeAspect="1"/></p:cNvPicPr><p:nvPr/></p:nvPicPr>'
+        '<p:blipFill><a:blip r:embed="{rId}"{alpha}<a:stretch><a:fillRect/></a:stretch></p:blipFill>'
+        '<p:spPr><a:xfrm><a:off x="{x}" y="{y}"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm><a:prstGeom prst="rect"><a:avLst/></a:prstGeom></p:spPr></p:pic>'
+    )
+    LINK = '><a:hlinkClick action="ppaction://hlinksldjump" r:id="{rId}"{sound}</p:cNvPr>'
+    JUMP = '><a:hlinkClick action="ppaction://hlinkpres?slideindex={index}&amp;slidetitle=" r:id="{rId}"{sound}</p:cNvPr>'
+    RETURN = '><a:hlinkClick action="ppaction://hlinkshowjump?jump=lastslideviewed" r:id=""{sound}</p:cNvPr>'
+    SOUND = '><a:snd r:embed="{rId}" name="{name}"/></a:hlinkClick>'
+    ALPHA = '><a:alphaModFix amt="{amount}"/></a:blip>'
+    TEXT = (
+        '<p:sp><p:nvSpPr><p:cNvPr id="{id}" name="TextBox {name}"/><p:cNvSpPr txBox="1"/><p:nvPr/></p:nvSpPr>'
+        '<p:spPr><a:xfrm><a:off x="{x}" y="{y}"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm><a:prstGeom prst="rect"><a:avLst/></a:prstGeom><a:noFill/></p:spPr>'
+        '<p:txBody><a:bodyPr wrap="square" anchor="ctr"><a:spAutoFit/></a:bodyPr><a:lstStyle/><a:p><a:pPr algn="ctr"><a:defRPr sz="{size}">'
+        '<a:solidFill><a:srgbClr val="{color}"/></a:solidFill><a:latin typeface="{font}"/></a:defRPr></a:pPr><a:r><a:t>{text}</a:t></a:r></a:p></p:txBody></p:sp>'
+    )
+    TRANSITIONS: dict[tuple[None | str, Effect], str] = {}
+
+    def __init__(self, layout: str, resolve: typing.Callable[[str], str]):
+        self.__rels = [('rId1', pptx.opc.constants.RELATIONSHIP_TYPE.SLIDE_LAYOUT, layout)]
+        self.__targets: dict[tuple[str, str], str] = {}
+        self.__resolve = resolve
+        self.__shapes: list[dict[str, typing.Any]] = []
+        self.__transition = ''
+
+    def add_picture(self, image: str, left: float, top: float, width: float, height: float) -> dict[str, typing.Any]:
+        picture = {
+            'template': XmlCanvas.PICTURE,
+            'id': len(self.__shapes) + 2,
+            'name': len(self.__shapes) + 1,
+            'descr': XmlCanvas.get_descr(image),
+            'rId': self.__relate(pptx.opc.constants.RELATIONSHIP_TYPE.IMAGE, self.__resolve(image)),
+            'x': int(left),
+            'y': int(top),
+            'cx': int(width),
+            'cy': int(height),
+            'alpha': '/>',
+            'link': '/>',
+        }
+        self.__shapes.append(picture)
+        return picture
+
+    def set_transparency(self, picture: dict[str, typing.Any], transparency: float) -> None:
+        picture['alpha'] = XmlCanvas.ALPHA.format(amount=int(transparency * 100000))
+
+    def add_text(self, text: str, left: float, top: float, width: float, height: float, font: str, size: int, color: tuple[int, int, int]) -> None:
+        self.__shapes.append({
+            'template': XmlCanvas.TEXT,
+            'id': len(self.__shapes) + 2,
+            'name': len(self.__shapes) + 1,
+            'x': int(left),
+            'y': int(top),
+            'cx': int(width),
+            'cy': int(height),
+            'size': size * 100,
+            'color': '%02X%02X%02X' % color,
+            'font': xml.sax.saxutils.escape(font, {'"': '&quot;'}),
+            'text': xml.sax.saxutils.escape(text),
+        })
+
+    def add_music(self, music: str, left: float, top: float, width: float, height: float) -> None:
+        raise ValueError(f'Music {music} needs a media shape, compose this slide with SlideCanvas')
+
+    def add_transition(self, sound: None | str, effect: Effect) -> None:
+        audio_id = None
+        if sound is not None:
+            audio_id = self.__relate(pptx.opc.constants.RELATIONSHIP_TYPE.AUDIO, self.__resolve(sound))
+        if (audio_id, effect) not in XmlCanvas.TRANSITIONS:
+            slide = pptx.oxml.slide.CT_Slide.new()
+            slide.insert(-1, Canvas.get_transition_element(audio_id, effect))
+            content = lxml.etree.tostring(slide, encoding='unicode')
+            XmlCanvas.TRANSITIONS[audio_id, effect] = content[content.index('</p:cSld>') + 9:content.rindex('<p:clrMapOvr>')]
+        self.__transition = XmlCanvas.TRANSITIONS[audio_id, effect]
+
+    def add_link(self, picture: dict[str, typing.Any], link: int | tuple[str, int], sound: None | str = None) -> None:
+        sound_xml = '/>'
+        if sound is not None:
+            audio_id = self.__relate(pptx.opc.constants.RELATIONSHIP_TYPE.AUDIO, self.__resolve(sound))
+            sound_xml = XmlCanvas.SOUND.format(rId=audio_id, name=XmlCanvas.get_descr(sound))
+        if isinstance(link, int):
+            rId = self.__relate(pptx.opc.constants.RELATIONSHIP_TYPE.SLIDE, f'/ppt/slides/slide{link + 1}.xml')
+            picture['link'] = XmlCanvas.LINK.format(rId=rId, sound=sound_xml)
+        else:
+            rId = self.__relate(pptx.opc.constants.RELATIONSHIP_TYPE.HYPERLINK, link[0])
+            picture['link'] = XmlCanvas.JUMP.format(rId=rId, index=link[1] + 1, sound=sound_xml)
+
+    def add_return(self, picture: dict[str, typing.Any], sound: None | str = None) -> None:
+        sound_xml = '/>'
+        if sound is not None:
+            audio_id = self.__relate(pptx.opc.constants.RELATIONSHIP_TYPE.AUDIO, self.__resolve(sound))
+            sound_xml = XmlCanvas.SOUND.format(rId=audio_id, name=XmlCanvas.get_descr(sound))
+        picture['link'] = XmlCanvas.RETURN.format(sound=sound_xml)
+
+    def get_blob(self) -> bytes:
+        return (XmlCanvas.HEADER + XmlCanvas.SLIDE.format(
+            shapes=''.join(
+                shape['template'].format(**shape)
+                for shape in self.__shapes
+            ),
+            transition=self.__transition,
+        )).encode()
+
+    def get_shape_count(self) -> int:
+        return len(self.__shapes)
+
+    def get_rels(self) -> list[tuple[str, str, str]]:
+        return [
+            (rId, reltype, XmlCanvas.get_ref(partname))
+            for rId, reltype, partname in self.__rels
+        ]
+
+    def get_targets(self) -> list[tuple[str, str, str]]:
+        return self.__rels
+
+    def __relate(self, reltype: str, partname: str) -> str:
+        if (reltype, partname) not in self.__targets:
+            rId = f'rId{len(self.__rels) + 1}'
+            self.__targets[reltype, partname] = rId
+            self.__rels.append((rId, reltype, partname))
+        return self.__targets[reltype, partname]
+
+    @staticmethod
+    @functools.cache
+    def get_ref(partname: str) -> str:
+        if not partname.startswith('/'):
+            return partname
+        return pptx.opc.packuri.PackURI(partname).relative_ref(XmlCanvas.BASE_URI)
+
+    @staticmethod
+    @functools.cache
+    def get_descr(path: str) -> str:
+        return xml.sax.saxutils.escape(os.path.basename(path), {'"': '&quot;'})
@@ -0,0 +1,77 @@
+import concurrent.futures
+import os
+import pickle
+import time
+import typing
+
+
+class Checkpoint:
+
+    INTERVAL = 30.0
+
+    def __init__(self, path: str, interval: float = INTERVAL):
+        self.__path = path
+        self.__interval = interval
+        self.__offset = 0
+        self.__last = time.monotonic()
+        self.__executor = concurrent.futures.ThreadPoolExecutor(1)
+        self.__pending: None | concurrent.futures.Future = None
+        os.makedirs(self.__path, exist_ok=True)
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    def due(self) -> bool:
+        return time.monotonic() - self.__last >= self.__interval
+
+    def save(self, frame: object, state: object) -> None:
+        self.wait()
+        self.__pending = self.__executor.submit(self.__write, frame, state)
+        self.__last = time.monotonic()
+
+    def reset(self) -> None:
+        self.wait()
+        for name in ('state.bin', 'frames.bin'):
+            try:
+                os.remove(os.path.join(self.__path, name))
+            except FileNotFoundError:
+                pass
+        self.__offset = 0
+        self.__last = time.monotonic()
+
+    def load(self) -> None | tuple[typing.Iterator[typing.Any], typing.Any]:
+        self.wait()
+        try:
+            with open(os.path.join(self.__path, 'state.bin'), 'rb') as file:
+                offset, state = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        with open(os.path.join(self.__path, 'frames.bin'), 'r+b') as file:
+            file.truncate(offset)
+        self.__offset = offset
+        return self.__read(offset), state
+
+    def wait(self) -> None:
+        if self.__pending is not None:
+            self.__pending.result()
+            self.__pending = None
+
+    def __read(self, offset: int) -> typing.Iterator[typing.Any]:
+        with open(os.path.join(self.__path, 'frames.bin'), 'rb') as file:
+            while file.tell() < offset:
+                yield pickle.load(file)
+
+    def __write(self, frame: object, state: object) -> None:
+        with open(os.path.join(self.__path, 'frames.bin'), 'ab') as file:
+            file.truncate(self.__offset)
+            pickle.dump(frame, file, pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+            self.__offset = file.tell()
+        temporary = os.path.join(self.__path, 'state.tmp')
+        with open(temporary, 'wb') as file:
+            pickle.dump((self.__offset, state), file, pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, os.path.join(self.__path, 'state.bin'))
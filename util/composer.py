@@ -1,18 +1,40 @@
+import collections
+import concurrent.futures
+import functools
+import hashlib
+import os
+import pickle
+import typing
 import lxml.etree # type: ignore
-import pptx, pptx.opc.constants, pptx.media, pptx.shapes.picture, pptx.slide
-from model.entity.screen import Screen, MainScreen, MazeScreen, DialogScreen
+import pptx, pptx.opc.constants, pptx.opc.package, pptx.media, pptx.parts.image, pptx.parts.media, pptx.slide
+from model.entity.position import Position
+from model.entity.screen import Screen, MainScreen, MazeScreen, DialogScreen, MessageScreen
 from model.entity.state import State
+from model.enum.asset.message import Message
 from model.enum.asset.music import Music
 from model.enum.asset.sound import Sound
 from model.enum.button import Button
 from model.enum.cell import Cell
-from model.enum.effect import Effect
+from util.cache import Cache
+from util.canvas import Canvas, SlideCanvas, XmlCanvas
 from util.logger import Logger
+from util.metrics import Metrics
+from util.optimizer import Optimizer
+from util.writer import Writer
+
+Link = int | tuple[str, int]
+Context = tuple[Screen, dict[Button, int], dict[Button, Link]]
+Result = None | tuple[bytes, list[tuple[str, str, str]], int, None | tuple[str, bytes]]
 
 
 class Composer:
 
-    def __init__(self, assets: dict[str, str], rows: float, columns: float) -> None:
+    CHUNK = 256
+    PLANS = 4096
+    MARGIN = (6, 2)
+    ASSETS = (pptx.opc.constants.RELATIONSHIP_TYPE.IMAGE, pptx.opc.constants.RELATIONSHIP_TYPE.AUDIO)
+
+    def __init__(self, assets: dict[str, str], rows: float, columns: float, click_sounds: bool = False) -> None:
         self.presentation = None
         self.width = None
         self.height = None
@@ -20,29 +42,80 @@ class Composer:
         self.rows = rows
         self.columns = columns
         self.assets = assets
+        self.click_sounds = click_sounds
+        self.__writer: None | Writer = None
+        self.__level = Writer.LEVEL
+        self.__keeper: None | pptx.slide.Slide = None
+        self.__layout: None | pptx.slide.SlideLayout = None
+        self.__plans: collections.OrderedDict[tuple, list[tuple[str, float, float, None | float]]] = collections.OrderedDict()
+        self.__parts: dict[str, pptx.opc.package.Part] = {}
+        self.__digests: dict[str, pptx.opc.package.Part] = {}
+        paths = set()
         for key, value in assets.items():
             if key.startswith('Image.'):
                 assert value.endswith('.png'), f'Invalid image asset {key}={value}'
-            elif key.startswith('Music.'):
+            elif key.startswith('Music['):
                 assert value.endswith('.mp3'), f'Invalid music asset {key}={value}'
-            elif key.startswith('Sound.'):
+            elif key.startswith('Sound['):
                 assert value.endswith('.wav'), f'Invalid sound asset {key}={value}'
+            else:
+                continue
+            paths.add(value)
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            self.__blobs = dict(zip(sorted(paths), executor.map(Composer.__load, sorted(paths))))
+        self.__hashes = {
+            path: digest
+            for path, (_, digest) in self.__blobs.items()
+        }
+        self.__mapping = Cache.digest(sorted(
+            (key, value)
+            for key, value in assets.items()
+            if not key.startswith('Message[')
+        ))
+        self.__cache: None | Cache = None
+
+    def optimize(self, levels: list[list[str]], optimizer: Optimizer) -> None:
+        self.__create()
+        main = MainScreen(levels)
+        tile = max(
+            self.__scale(main.enter(index).state)
+            for index in range(len(levels))
+        )
+        extents: dict[str, tuple[float, float]] = {}
+        for key, width, height in self.__get_extents(tile):
+            path = self.assets[key]
+            extents[path] = (
+                max(width, extents.get(path, (0, 0))[0]),
+                max(height, extents.get(path, (0, 0))[1]),
+            )
+        paths = sorted(extents.keys())
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            blobs = list(executor.map(lambda path: optimizer.run(self.__blobs[path][0], *extents[path]), paths))
+        saved = 0
+        for path, blob in zip(paths, blobs):
+            saved += len(self.__blobs[path][0]) - len(blob)
+            self.__blobs[path] = (blob, hashlib.sha1(blob).hexdigest())
+            self.__hashes[path] = self.__blobs[path][1]
+        Metrics.count('compose.asset_bytes_saved', saved)
+        Logger.write(f'Done: #{len(paths)} images optimized for {optimizer.dpi} DPI, {saved} bytes saved')
 
     def prepare(self, count: int) -> None:
+        self.__create()
+        for index in range(count):
+            Logger.rewrite(f'Working: #{index} slides allocated')
+            self.presentation.slides.add_slide(self.__layout)
+        Logger.write(f'Done: #{index} slides allocated')
+
+    def __create(self) -> None:
         self.presentation = pptx.Presentation()
+        self.__parts = {}
+        self.__digests = {}
         self.width = self.presentation.slide_width or 0
         self.height = self.presentation.slide_height or 0
         self.size = min(
             self.width / self.rows,
             self.height / self.columns
         )
-        self.__prepare()
-        for index in range(count):
-            Logger.rewrite(f'Working: #{index} slides allocated')
-            self.presentation.slides.add_slide(self.presentation.slide_layouts[6])
-        Logger.write(f'Done: #{index} slides allocated')
-
-    def __prepare(self) -> None:
         showpr_xml = '''
             <root
                 xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"
@@ -75,61 +148,398 @@ class Composer:
         element = lxml.etree.fromstring(presProps.blob)
         element.insert(0, showpr_element)
         presProps.blob = lxml.etree.tostring(element)
+        self.__layout = self.presentation.slide_layouts[6]
+        self.__layout.name = 'Game'
+        background_id = self.__layout.part.relate_to(
+            self.__resolve(self.assets['Image.Menu[BACKGROUND]']),
+            pptx.opc.constants.RELATIONSHIP_TYPE.IMAGE
+        )
+        background_xml = f'''
+            <root
+                xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"
+                xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+                xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"
+            >
+                <p:bg>
+                    <p:bgPr>
+                        <a:blipFill dpi="0" rotWithShape="1">
+                            <a:blip r:embed="{background_id}"/>
+                            <a:srcRect/>
+                            <a:stretch>
+                                <a:fillRect/>
+                            </a:stretch>
+                        </a:blipFill>
+                        <a:effectLst/>
+                    </p:bgPr>
+                </p:bg>
+            </root>
+        '''
+        background_element = lxml.etree.fromstring(background_xml)
+        background_element = background_element.xpath('.//p:bg', namespaces=background_element.nsmap)[0]
+        self.__layout.element.cSld.insert(0, background_element)
 
-    def compose(self, screens: dict[str, tuple[Screen, dict[Button, str]]], limit: int = 1000000) -> pptx.presentation.Presentation:
-        hashes = list(screens.keys())
+    def compose(self, screens: dict[int, tuple[Screen, dict[Button, int]]], limit: int = 1000000) -> pptx.presentation.Presentation:
+        indices = {
+            screen_hash: index
+            for index, screen_hash in enumerate(screens.keys())
+        }
         for index, context in enumerate(screens.values()):
             if index >= limit:
                 break
             Logger.rewrite(f'Working: #{index} slides processed')
             screen, screen_actions = context
-            slide = self.presentation.slides[index]
-            slide_actions = self.__compose(slide, screen)
-            if len(screen_actions) != len(slide_actions):
-                raise ValueError(f'Action slides {len(screen_actions)} and buttons {len(slide_actions)} count mismatch')
-            for action in screen_actions.keys():
-                index = hashes.index(screen_actions[action])
-                target = self.presentation.slides[index]
-                button = slide_actions[action]
-                button.click_action.target_slide = target
+            canvas = SlideCanvas(self.presentation.slides[index], self.__resolve, self.presentation.slides)
+            self.__link(canvas, screen, Composer.__index(screen_actions, indices))
+            Metrics.count('compose.shapes', canvas.get_shape_count())
+            Metrics.count('compose.slides')
         Logger.write(f'Done: #{index} slides processed')
         return self.presentation
 
-    def __compose(self, slide: pptx.slide.Slide, screen: Screen) -> dict[Button, pptx.shapes.picture.Picture]:
+    def stream(self, screens: dict[int, tuple[Screen, dict[Button, int]]], path: str, direct: bool = False, workers: int = 1, cache: None | Cache = None, shard: None | int = None, level: int = Writer.LEVEL) -> None:
+        self.__cache = cache
+        self.__level = level
+        root, extension = os.path.splitext(path)
+        paths = [path] + [
+            f'{root}-{deck + 1}{extension}'
+            for deck in range(1, 1 if shard is None else -(-len(screens) // shard))
+        ]
+        self.__open(paths[0])
+        indices = {
+            screen_hash: index
+            for index, screen_hash in enumerate(screens.keys())
+        }
+        chunks = Composer.__chunk(screens, indices, shard, [os.path.basename(deck_path) for deck_path in paths])
+        render = functools.partial(self.render, self.__layout.part.partname)
+        if direct and workers > 1:
+            with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+                self.__assemble(Composer.__submit(executor, render, chunks, workers * 2), shard, paths)
+        elif direct:
+            self.__assemble((
+                item
+                for chunk in chunks
+                for item in zip(chunk, render(chunk))
+            ), shard, paths)
+        else:
+            self.__assemble((
+                (context, None)
+                for chunk in chunks
+                for context in chunk
+            ), shard, paths)
+        self.__close()
+        self.__cache = None
+
+    def __open(self, path: str) -> None:
+        self.__create()
+        self.__writer = Writer(path, self.presentation, self.__level)
+        self.__keeper = self.presentation.slides.add_slide(self.__layout)
+
+    def __close(self) -> None:
+        self.__drop(self.__keeper)
+        Logger.write(f'Done: #{self.__writer.count} slides streamed')
+        Logger.rewrite('Working: finalizing presentation')
+        self.__writer.close()
+        self.__writer = None
+        self.__keeper = None
+
+    def render(self, layout: str, chunk: list[Context]) -> list[Result]:
+        rendered: list[Result] = []
+        for screen, screen_actions, slide_indices in chunk:
+            if screen.music != Music.NONE:
+                rendered.append(None)
+                continue
+            partnames = {
+                screen_actions[action]: f'/ppt/slides/slide{link + 1}.xml'
+                for action, link in slide_indices.items()
+                if isinstance(link, int)
+            }
+            key = None
+            if self.__cache is not None:
+                key = self.__get_key(layout, screen, screen_actions, slide_indices)
+                cached = self.__fetch(key, partnames)
+                if cached is not None:
+                    rendered.append(cached)
+                    continue
+            canvas = XmlCanvas(layout, str)
+            self.__link(canvas, screen, slide_indices)
+            blob, targets, shapes = canvas.get_blob(), canvas.get_targets(), canvas.get_shape_count()
+            entry = None
+            if key is not None:
+                hashes = {
+                    partname: screen_hash
+                    for screen_hash, partname in partnames.items()
+                }
+                entry = (key, pickle.dumps((
+                    blob,
+                    [
+                        (rId, reltype, hashes[target] if reltype == pptx.opc.constants.RELATIONSHIP_TYPE.SLIDE else target)
+                        for rId, reltype, target in targets
+                    ],
+                    shapes,
+                    {
+                        target: self.__hashes[target]
+                        for _, reltype, target in targets
+                        if reltype in Composer.ASSETS
+                    },
+                ), pickle.HIGHEST_PROTOCOL))
+            rendered.append((blob, targets, shapes, entry))
+        return rendered
+
+    def __get_key(self, layout: str, screen: Screen, screen_actions: dict[Button, int], slide_indices: dict[Button, Link]) -> str:
+        return Cache.digest(
+            'slide',
+            self.__mapping,
+            layout,
+            self.width,
+            self.height,
+            self.size,
+            self.click_sounds,
+            screen.get_hash(),
+            tuple(screen_actions.items()),
+            tuple(link for link in slide_indices.values() if not isinstance(link, int)),
+            self.assets[f'Message[{screen.message}]'] if isinstance(screen, (DialogScreen, MessageScreen)) else None,
+        )
+
+    def __fetch(self, key: str, partnames: dict[int, str]) -> Result:
+        record = self.__cache.get('slides', key)
+        if record is None:
+            return None
+        blob, targets, shapes, digests = pickle.loads(record)
+        for path, digest in digests.items():
+            if self.__hashes.get(path) != digest:
+                return None
+        return (blob, [
+            (rId, reltype, partnames[target] if reltype == pptx.opc.constants.RELATIONSHIP_TYPE.SLIDE else target)
+            for rId, reltype, target in targets
+        ], shapes, None)
+
+    def __assemble(self, rendered: typing.Iterable[tuple[Context, Result]], shard: None | int, paths: list[str]) -> None:
+        for index, (context, result) in enumerate(rendered):
+            if shard is not None and index > 0 and index % shard == 0:
+                self.__close()
+                self.__open(paths[index // shard])
+            Logger.rewrite(f'Working: #{index} slides streamed')
+            Metrics.count('compose.slides')
+            screen, _, slide_indices = context
+            if result is not None:
+                blob, targets, shapes, entry = result
+                if self.__cache is not None:
+                    if entry is None:
+                        Metrics.count('compose.cache_hits')
+                    else:
+                        Metrics.count('compose.cache_misses')
+                        self.__cache.put('slides', *entry)
+                Metrics.count('compose.shapes', shapes)
+                self.__writer.add_slide(blob, [
+                    (rId, reltype, XmlCanvas.get_ref(self.__resolve(target).partname if reltype in Composer.ASSETS else target))
+                    for rId, reltype, target in targets
+                ])
+            else:
+                slide = self.presentation.slides.add_slide(self.__layout)
+                canvas = SlideCanvas(slide, self.__resolve)
+                self.__link(canvas, screen, slide_indices)
+                Metrics.count('compose.shapes', canvas.get_shape_count())
+                for rel in slide.part.rels.values():
+                    if rel.reltype != pptx.opc.constants.RELATIONSHIP_TYPE.SLIDE_LAYOUT and not rel.is_external:
+                        self.__keep(rel.target_part, rel.reltype)
+                self.__writer.add_slide(canvas.get_blob(), canvas.get_rels())
+                self.__drop(slide)
+
+    def __getstate__(self) -> dict[str, typing.Any]:
+        return {
+            'width': self.width,
+            'height': self.height,
+            'size': self.size,
+            'rows': self.rows,
+            'columns': self.columns,
+            'assets': self.assets,
+            'click_sounds': self.click_sounds,
+            'cache': self.__cache,
+            'hashes': self.__hashes,
+            'mapping': self.__mapping,
+        }
+
+    def __setstate__(self, state: dict[str, typing.Any]) -> None:
+        self.__cache = state.pop('cache')
+        self.__hashes = state.pop('hashes')
+        self.__mapping = state.pop('mapping')
+        self.__dict__.update(state)
+        self.presentation = None
+        self.__writer = None
+        self.__keeper = None
+        self.__layout = None
+        self.__plans = collections.OrderedDict()
+        self.__parts = {}
+        self.__digests = {}
+        self.__blobs = {}
+
+    @staticmethod
+    def __index(screen_actions: dict[Button, int], indices: dict[int, int], shard: None | int = None, deck: int = 0, names: None | list[str] = None) -> dict[Button, Link]:
+        links: dict[Button, Link] = {}
+        for action, screen_hash in screen_actions.items():
+            index = indices[screen_hash]
+            if shard is None:
+                links[action] = index
+            elif index // shard == deck:
+                links[action] = index % shard
+            else:
+                links[action] = (names[index // shard], index % shard)
+        return links
+
+    @staticmethod
+    def __chunk(screens: dict[int, tuple[Screen, dict[Button, int]]], indices: dict[int, int], shard: None | int = None, names: None | list[str] = None) -> typing.Iterator[list[Context]]:
+        chunk = []
+        for index, (screen, screen_actions) in enumerate(screens.values()):
+            if shard is not None and isinstance(screen, MessageScreen):
+                raise ValueError('Shared dialogs cannot be split across shards')
+            deck = 0 if shard is None else index // shard
+            chunk.append((screen, screen_actions, Composer.__index(screen_actions, indices, shard, deck, names)))
+            if len(chunk) >= Composer.CHUNK or (shard is not None and (index + 1) % shard == 0):
+                yield chunk
+                chunk = []
+        if len(chunk) > 0:
+            yield chunk
+
+    @staticmethod
+    def __submit(executor: concurrent.futures.Executor, render: typing.Callable, chunks: typing.Iterator[list[Context]], window: int) -> typing.Iterator[tuple[Context, Result]]:
+        pending: collections.deque = collections.deque()
+        for chunk in chunks:
+            pending.append((chunk, executor.submit(render, chunk)))
+            if len(pending) >= window:
+                chunk, future = pending.popleft()
+                yield from zip(chunk, future.result())
+        while len(pending) > 0:
+            chunk, future = pending.popleft()
+            yield from zip(chunk, future.result())
+
+    def __resolve(self, path: str) -> pptx.opc.package.Part:
+        if path not in self.__parts:
+            blob, digest = self.__blobs[path]
+            if digest not in self.__digests:
+                package = self.presentation.part.package
+                if path.endswith('.png'):
+                    part = pptx.parts.image.ImagePart.new(package, pptx.parts.image.Image.from_blob(blob, os.path.basename(path)))
+                    reltype = pptx.opc.constants.RELATIONSHIP_TYPE.IMAGE
+                else:
+                    part = pptx.parts.media.MediaPart.new(package, pptx.media.Video.from_blob(blob, 'audio/wav', os.path.basename(path)))
+                    reltype = pptx.opc.constants.RELATIONSHIP_TYPE.AUDIO
+                if self.__writer is not None:
+                    self.__keep(part, reltype)
+                Metrics.count('compose.media_parts')
+                self.__digests[digest] = part
+            self.__parts[path] = self.__digests[digest]
+        return self.__parts[path]
+
+    def __keep(self, part: pptx.opc.package.Part, reltype: str) -> None:
+        self.__writer.add_part(part.partname, part.content_type, part.blob)
+        self.__keeper.part.relate_to(part, reltype)
+
+    @staticmethod
+    def __load(path: str) -> tuple[bytes, str]:
+        assert os.path.isfile(path), f'Missing asset {path}'
+        with open(path, 'rb') as file:
+            blob = file.read()
+        return blob, hashlib.sha1(blob).hexdigest()
+
+    def __link(self, canvas: Canvas, screen: Screen, slide_indices: dict[Button, Link]) -> None:
+        slide_actions = self.__compose(canvas, screen)
+        if len(slide_indices) != len(slide_actions):
+            raise ValueError(f'Action slides {len(slide_indices)} and buttons {len(slide_actions)} count mismatch')
+        for action in slide_indices.keys():
+            sound = self.__get_sound(screen, action) if self.click_sounds else None
+            if isinstance(screen, MessageScreen):
+                canvas.add_return(slide_actions[action], sound)
+            else:
+                canvas.add_link(slide_actions[action], slide_indices[action], sound)
+
+    def __get_sound(self, screen: Screen, action: Button) -> None | str:
+        next_screen = screen.handle(action)
+        sound = Sound.BUTTON_HIT if next_screen is None or next_screen is screen else next_screen.sound
+        return None if sound == Sound.NONE else self.assets[f'Sound[{sound}]']
+
+    def __drop(self, slide: pptx.slide.Slide) -> None:
+        slides = self.presentation.element.get_or_add_sldIdLst()
+        for slide_id in slides:
+            if slide_id.id == slide.slide_id:
+                slides.remove(slide_id)
+                self.presentation.part.drop_rel(slide_id.rId)
+
+    def __compose(self, canvas: Canvas, screen: Screen) -> dict[Button, typing.Any]:
         if screen.music != Music.NONE:
-            audio = slide.shapes.add_movie(
+            canvas.add_music(
                 self.assets[f'Music[{screen.music}]'],
                 0,
                 0,
                 self.size,
-                self.size,
-                None,
-                mime_type='audio/mp3'
+                self.size
             )
-            self.set_autoplay(audio)
-        if screen.sound != Sound.NONE:
-            self.add_transition(slide, screen.sound, screen.effect)
+        if screen.sound != Sound.NONE and not self.click_sounds:
+            canvas.add_transition(self.assets[f'Sound[{screen.sound}]'], screen.effect)
         else:
-            self.add_transition(slide, Sound.NONE, screen.effect)
-        slide.shapes.add_picture(
-            self.assets['Image.Menu[BACKGROUND]'],
-            0,
-            0,
-            self.width,
-            self.height
-        )
+            canvas.add_transition(None, screen.effect)
         methods = {
             MainScreen.__name__: self.__compose_main,
             MazeScreen.__name__: self.__compose_maze,
             DialogScreen.__name__: self.__compose_dialog,
+            MessageScreen.__name__: self.__compose_message,
         }
         screen_type = screen.__class__.__name__
         if screen_type in methods:
-            return methods[screen_type](slide, screen)
+            return methods[screen_type](canvas, screen)
         else:
             raise ValueError(f'Unhandled screen {screen_type}')
 
-    def __compose_main(self, slide: pptx.slide.Slide, screen: MainScreen) -> dict[Button, pptx.shapes.picture.Picture]:
+    def __plan(self, state: State) -> list[tuple[str, float, float, None | float]]:
+        view = (state.level.layout.key, state.get_view(MazeScreen.RADIUS))
+        if view in self.__plans:
+            self.__plans.move_to_end(view)
+            return self.__plans[view]
+        size = self.__scale(state)
+        offset = (
+            size * 5,
+            size * 1
+        )
+        grid = state.level.layout.grid
+        plan: list[tuple[str, float, float, None | float]] = []
+        for top in range(max(0, state.position.top - MazeScreen.RADIUS), min(len(grid), state.position.top + MazeScreen.RADIUS + 1)):
+            for left in range(max(0, state.position.left - MazeScreen.RADIUS), min(len(grid[top]), state.position.left + MazeScreen.RADIUS + 1)):
+                cell = state.level.get(Position(left, top))
+                if cell == Cell.SPACE:
+                    continue
+                distance = max(
+                    abs(state.position.left - left),
+                    abs(state.position.top - top)
+                )
+                transparency = max(0.0, min(1.0, 1 - (distance - 1) / MazeScreen.RADIUS))
+                if transparency <= 0:
+                    continue
+                plan.append((
+                    self.assets[f'Image.Maze[{cell}]'],
+                    left * size + offset[0],
+                    top * size + offset[1],
+                    transparency
+                ))
+        plan.append((
+            self.assets[f'Image.Maze[{Cell.WIZARD}]'],
+            state.position.left * size + offset[0],
+            state.position.top * size + offset[1],
+            None
+        ))
+        for gems in range(3):
+            if state.inventory.gems <= gems:
+                image = self.assets[f'Image.Item[{Cell.GEM}].Missing']
+            else:
+                image = self.assets[f'Image.Item[{Cell.GEM}].Having']
+            plan.append((image, size * (1 + gems), size, None))
+        for keys in range(1):
+            if state.inventory.keys <= keys:
+                continue
+            plan.append((self.assets[f'Image.Item[{Cell.KEY}].Having'], size * (1 + keys), size * 3, None))
+        self.__plans[view] = plan
+        if len(self.__plans) > Composer.PLANS:
+            self.__plans.popitem(last=False)
+        return plan
+
+    def __compose_main(self, canvas: Canvas, screen: MainScreen) -> dict[Button, typing.Any]:
         for corner in range(4):
             for tile in range(3):
                 for side in range(2):
@@ -141,7 +551,7 @@ class Composer:
                         tile_offset[0] = self.width - tile_offset[0] - self.size
                     if corner // 2 == 1:
                         tile_offset[1] = self.height - tile_offset[1] - self.size
-                    picture = slide.shapes.add_picture(
+                    picture = canvas.add_picture(
                         self.assets[f'Image.Maze[{Cell.WALL}]'],
                         tile_offset[0],
                         tile_offset[1],
@@ -151,13 +561,13 @@ class Composer:
                     if tile == 0:
                         break
                     else:
-                        self.set_transparency(picture, 1 - tile / 3)
+                        canvas.set_transparency(picture, 1 - tile / 3)
         logo_size = (self.size * 10, self.size * 4)
         logo_offset = (
             (self.width - logo_size[0]) / 2,
             (self.height - logo_size[1]) / 2,
         )
-        slide.shapes.add_picture(
+        canvas.add_picture(
             self.assets['Image.Menu[LOGO]'],
             logo_offset[0],
             logo_offset[1],
@@ -169,7 +579,7 @@ class Composer:
             self.width - credits_size[0],
             self.height - credits_size[1],
         )
-        slide.shapes.add_picture(
+        canvas.add_picture(
             self.assets['Image.Menu[CREDITS]'],
             credits_offset[0],
             credits_offset[1],
@@ -177,7 +587,7 @@ class Composer:
             credits_size[1]
         )
         return {
-            Button.PLAY: slide.shapes.add_picture(
+            Button.PLAY: canvas.add_picture(
                 self.assets[f'Image.Button[{Button.PLAY}]'],
                 (self.width - self.size * 3) / 2,
                 logo_offset[1] + logo_size[1] + self.size * 2,
@@ -186,46 +596,49 @@ class Composer:
             ),
         }
 
-    def __compose_maze(self, slide: pptx.slide.Slide, screen: MazeScreen) -> dict[Button, pptx.shapes.picture.Picture]:
-        return self.__paint_state(slide, screen.state)
+    def __compose_maze(self, canvas: Canvas, screen: MazeScreen) -> dict[Button, typing.Any]:
+        return self.__paint_state(canvas, screen.state)
 
-    def __compose_dialog(self, slide: pptx.slide.Slide, screen: DialogScreen) -> dict[Button, pptx.shapes.picture.Picture]:
-        self.__paint_state(slide, screen.state)
-        picture = slide.shapes.add_picture(
+    def __compose_dialog(self, canvas: Canvas, screen: DialogScreen) -> dict[Button, typing.Any]:
+        self.__paint_state(canvas, screen.state)
+        picture = canvas.add_picture(
             self.assets['Image.Menu[BACKGROUND]'],
             0,
             0,
             self.width,
             self.height
         )
-        self.set_transparency(picture, 0.5)
+        canvas.set_transparency(picture, 0.5)
+        return self.__paint_message(canvas, screen.message)
+
+    def __compose_message(self, canvas: Canvas, screen: MessageScreen) -> dict[Button, typing.Any]:
+        return self.__paint_message(canvas, screen.message)
+
+    def __paint_message(self, canvas: Canvas, message: Message) -> dict[Button, typing.Any]:
         dialog_size = (self.size * 16, self.size * 4)
         dialog_offset = (
             (self.width - dialog_size[0]) / 2,
             (self.height - dialog_size[1]) * 2 / 3,
         )
-        slide.shapes.add_picture(
+        canvas.add_picture(
             self.assets['Image.Menu[DIALOG]'],
             dialog_offset[0],
             dialog_offset[1],
             dialog_size[0],
             dialog_size[1]
         )
-        textbox = slide.shapes.add_textbox(
+        canvas.add_text(
+            self.assets[f'Message[{message}]'],
             dialog_offset[0] + self.size,
             dialog_offset[1] + self.size,
             dialog_size[0] - self.size * 2,
-            dialog_size[1] - self.size * 2
-        ).text_frame
-        textbox.text = self.assets[f'Message[{screen.message}]']
-        textbox.word_wrap = True
-        textbox.vertical_anchor = pptx.enum.text.MSO_ANCHOR.MIDDLE
-        textbox.paragraphs[0].alignment = pptx.enum.text.PP_ALIGN.CENTER
-        textbox.paragraphs[0].font.name = 'Courier New'
-        textbox.paragraphs[0].font.size = pptx.util.Pt(24)
-        textbox.paragraphs[0].font.color.rgb = pptx.dml.color.RGBColor(255, 255, 255)
+            dialog_size[1] - self.size * 2,
+            'Courier New',
+            24,
+            (255, 255, 255)
+        )
         return {
-            Button.CLOSE: slide.shapes.add_picture(
+            Button.CLOSE: canvas.add_picture(
                 self.assets[f'Image.Button[{Button.CLOSE}]'],
                 dialog_offset[0] + dialog_size[0] - self.size,
                 dialog_offset[1],
@@ -234,156 +647,65 @@ class Composer:
             ),
         }
 
-    def __paint_state(self, slide: pptx.slide.Slide, state: State) -> dict[Button, pptx.shapes.picture.Picture]:
-        offset = (
-            self.size * 5,
-            self.size * 1
-        )
-        for top, line in enumerate(state.level.grid):
-            for left, cell in enumerate(line):
-                if cell == Cell.SPACE:
-                    continue
-                distance = max(
-                    abs(state.position.left - left),
-                    abs(state.position.top - top)
-                )
-                transparency = max(0.0, min(1.0, 1 - (distance - 1) / 3))
-                if transparency <= 0:
-                    continue
-                picture = slide.shapes.add_picture(
-                    self.assets[f'Image.Maze[{cell}]'],
-                    left * self.size + offset[0],
-                    top * self.size + offset[1],
-                    self.size,
-                    self.size
-                )
-                self.set_transparency(picture, transparency)
-        slide.shapes.add_picture(
-            self.assets[f'Image.Maze[{Cell.WIZARD}]'],
-            state.position.left * self.size + offset[0],
-            state.position.top * self.size + offset[1],
-            self.size,
-            self.size
-        )
-        for gems in range(3):
-            if state.inventory.gems <= gems:
-                image = self.assets[f'Image.Item[{Cell.GEM}].Missing']
-            else:
-                image = self.assets[f'Image.Item[{Cell.GEM}].Having']
-            slide.shapes.add_picture(
-                image,
-                self.size * (1 + gems),
-                self.size,
-                self.size,
-                self.size
-            )
-        for keys in range(1):
-            if state.inventory.keys <= keys:
-                continue
-            slide.shapes.add_picture(
-                self.assets[f'Image.Item[{Cell.KEY}].Having'],
-                self.size * (1 + keys),
-                self.size * 3,
-                self.size,
-                self.size
-            )
+    def __paint_state(self, canvas: Canvas, state: State) -> dict[Button, typing.Any]:
+        size = self.__scale(state)
+        for image, left, top, transparency in self.__plan(state):
+            picture = canvas.add_picture(image, left, top, size, size)
+            if transparency is not None:
+                canvas.set_transparency(picture, transparency)
         return {
-            Button.UP: slide.shapes.add_picture(
+            Button.UP: canvas.add_picture(
                 self.assets[f'Image.Button[{Button.UP}]'],
-                self.size * 2,
-                self.height - self.size * 4,
-                self.size,
-                self.size
+                size * 2,
+                self.height - size * 4,
+                size,
+                size
             ),
-            Button.LEFT: slide.shapes.add_picture(
+            Button.LEFT: canvas.add_picture(
                 self.assets[f'Image.Button[{Button.LEFT}]'],
-                self.size * 1,
-                self.height - self.size * 3,
-                self.size,
-                self.size
+                size * 1,
+                self.height - size * 3,
+                size,
+                size
             ),
-            Button.RIGHT: slide.shapes.add_picture(
+            Button.RIGHT: canvas.add_picture(
                 self.assets[f'Image.Button[{Button.RIGHT}]'],
-                self.size * 3,
-                self.height - self.size * 3,
-                self.size,
-                self.size
+                size * 3,
+                self.height - size * 3,
+                size,
+                size
             ),
-            Button.DOWN: slide.shapes.add_picture(
+            Button.DOWN: canvas.add_picture(
                 self.assets[f'Image.Button[{Button.DOWN}]'],
-                self.size * 2,
-                self.height - self.size * 2,
-                self.size,
-                self.size
+                size * 2,
+                self.height - size * 2,
+                size,
+                size
             ),
         }
 
-    def set_transparency(self, picture: pptx.shapes.picture.Picture, transparency: float) -> None:
-        blip = picture.element.blipFill.blip
-        blip.insert(
-            0,
-            lxml.etree.Element(
-                '{http://schemas.openxmlformats.org/drawingml/2006/main}alphaModFix',
-                {'amt': str(int(transparency * 100000))}
-            )
-        )
+    def __get_extents(self, tile: float) -> list[tuple[str, float, float]]:
+        extents = [
+            ('Image.Menu[BACKGROUND]', self.width, self.height),
+            ('Image.Menu[LOGO]', self.size * 10, self.size * 4),
+            ('Image.Menu[CREDITS]', self.size * 4, self.size / 2),
+            ('Image.Menu[DIALOG]', self.size * 16, self.size * 4),
+            (f'Image.Button[{Button.PLAY}]', self.size * 3, self.size),
+            (f'Image.Button[{Button.CLOSE}]', self.size, self.size),
+            (f'Image.Maze[{Cell.WALL}]', self.size, self.size),
+        ]
+        for key in self.assets.keys():
+            if key.startswith(('Image.Maze[', 'Image.Item[')) or key in (f'Image.Button[{button}]' for button in MazeScreen.ACTIONS):
+                extents.append((key, tile, tile))
+        return [
+            (key, width, height)
+            for key, width, height in extents
+            if key in self.assets
+        ]
 
-    def set_autoplay(self, media: pptx.shapes.picture.Movie) -> None:
-        media_id = media.element.xpath('.//p:cNvPr')[0].attrib['id']
-        anchor_node = media.element.getparent().getparent().getparent().xpath(f'.//p:timing//p:video//p:spTgt[@spid="{media_id}"]')[0]
-        media_node = anchor_node.getparent().getparent()
-        media_node.set('numSld', '999999')
-        element = media_node.xpath('.//p:cTn', namespaces=media_node.nsmap)[0]
-        element.set('repeatCount', 'indefinite')
-        element = media_node.xpath('.//p:cond', namespaces=media_node.nsmap)[0]
-        element.set('delay', '0')
-
-    def add_transition(self, slide: pptx.slide.Slide, sound: Sound, effect: Effect) -> None:
-        sound_xml = ''
-        if sound != Sound.NONE:
-            audio = pptx.media.Video.from_path_or_file_like(self.assets[f'Sound[{sound}]'], 'audio/wav')
-            media_part = slide.part.package.get_or_add_media_part(audio)
-            slide.part.relate_to(media_part, pptx.opc.constants.RELATIONSHIP_TYPE.MEDIA)
-            audio_id = slide.part.relate_to(media_part, pptx.opc.constants.RELATIONSHIP_TYPE.AUDIO)
-            sound_xml = f'''
-                <p:sndAc>
-                    <p:stSnd>
-                        <p:snd r:embed="{audio_id}" name="media{audio_id}.wav"/>
-                    </p:stSnd>
-                </p:sndAc>
-            '''
-        effect_xml = ''
-        if effect != Effect.NONE:
-            if effect == Effect.FADE:
-                effect_xml = '<p:fade/>'
-            elif effect == Effect.WIPE_UP:
-                effect_xml = '<p:wipe dir="u"/>'
-            else:
-                raise ValueError(f'Unhandled effect {effect}')
-        content_xml = f'''
-            <root
-                xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"
-                xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"
-                xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"
-                xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"
-                xmlns:p14="http://schemas.microsoft.com/office/powerpoint/2010/main"
-            >
-                <mc:AlternateContent>
-                    <mc:Choice Requires="p14">
-                        <p:transition advClick="0" p14:dur="100">
-                            {effect_xml}
-                            {sound_xml}
-                        </p:transition>
-                    </mc:Choice>
-                    <mc:Fallback>
-                        <p:transition advClick="0">
-                            {effect_xml}
-                            {sound_xml}
-                        </p:transition>
-                    </mc:Fallback>
-                </mc:AlternateContent>
-            </root>
-        '''
-        content_element = lxml.etree.fromstring(content_xml)
-        content_element = content_element.xpath('.//mc:AlternateContent', namespaces=content_element.nsmap)[0]
-        slide.element.insert(-1, content_element)
+    def __scale(self, state: State) -> float:
+        grid = state.level.layout.grid
+        return min(
+            self.width / (len(grid[0]) + Composer.MARGIN[0]),
+            self.height / (len(grid) + Composer.MARGIN[1])
+        )
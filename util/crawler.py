@@ -1,40 +1,366 @@
-from model.entity.screen import MainScreen, Screen
+import array
+import concurrent.futures
+import contextlib
+import itertools
+import os
+import shutil
+import struct
+import tempfile
+import weakref
+from model.entity.screen import DialogScreen, MainScreen, Screen
 from model.enum.button import Button
+from util.cache import Cache
+from util.checkpoint import Checkpoint
+from util.graph import Graph
 from util.logger import Logger
+from util.metrics import Metrics
+from util.spool import Spool
+from util.storage import Storage
 
 
 class Crawler:
 
-    def __init__(self, levels: list[list[str]]):
+    LIMIT = 1_000_000
+    EMPTY = array.array('i', [-1] * len(Graph.BUTTONS))
+
+    def __init__(self, levels: list[list[str]], verify: bool = False, muted: bool = False, shared: bool = False, workers: int = 1, budget: None | int = None, cache: None | Cache = None, checkpoint: None | Checkpoint = None):
         self.__screen = MainScreen(levels)
-        self.__screens: dict[str, tuple[Screen, dict[Button, str]]] = {}
+        self.__digest = Cache.digest('crawl', Graph.VERSION, levels, muted, shared)
+        self.__layouts, self.__width = Graph.get_layouts(levels)
+        self.__screens: None | Graph = None
+        self.__indices: dict[int, int] | Storage = {}
+        self.__nodes: bytearray | Spool = bytearray()
+        self.__edges: array.array | Spool = array.array('i')
+        self.__exits: list[tuple[int, int]] = []
+        self.__expanded = 0
+        self.__saved = (0, 0, 0)
+        self.__spill: None | weakref.finalize = None
+        self.__verify = verify
+        self.__muted = muted
+        self.__shared = shared
+        self.__workers = workers
+        self.__budget = budget
+        self.__identities: dict[int, bytes] | Storage = {}
+        self.__cache = cache
+        self.__checkpoint = checkpoint
 
     @property
-    def screens(self) -> dict[str, tuple[Screen, dict[Button, str]]]:
+    def screens(self) -> Graph:
+        if self.__screens is None:
+            raise RuntimeError('Nothing crawled yet')
         return self.__screens
 
     def run(self) -> None:
-        self.__screens = {}
-        queue = [self.__screen]
+        cached = self.__cache is not None and self.__budget is None and not self.__verify
+        if cached:
+            record = self.__cache.get('crawl', self.__digest)
+            if record is not None:
+                self.__screens = Graph(record)
+                Metrics.count('crawl.screens', len(self.__screens))
+                Metrics.count('crawl.cache_hits')
+                Logger.write(f'Done: #{len(self.__screens)} screens loaded from cache')
+                return
+        self.__reset()
+        if self.__checkpoint is not None:
+            self.__checkpoint.reset()
+        self.__crawl(self.__digest if cached else None)
+
+    def resume(self) -> None:
+        if self.__checkpoint is None:
+            raise RuntimeError('No checkpoint to resume from')
+        self.__reset()
+        restored = self.__checkpoint.load()
+        if restored is None:
+            self.__crawl(None)
+            return
+        frames, state = restored
+        if not isinstance(state, tuple) or len(state) != 3 or state[0] != self.__digest:
+            raise RuntimeError(f'Checkpoint in {self.__checkpoint.path} was saved for other levels or options, aborting')
+        _, count, expanded = state
+        record = Graph.NODE.size + self.__width
+        for nodes, edges, exits in frames:
+            for screen_hash, in struct.iter_unpack(f'<Q{record - 8}x', nodes):
+                self.__indices[screen_hash] = len(self.__indices)
+            self.__nodes += nodes
+            self.__edges.extend(edges)
+            self.__exits.extend(exits)
+        if self.__verify:
+            for index in range(count):
+                self.__get_hash(self.__get_screen(index))
+        self.__edges.extend(itertools.repeat(-1, (count - expanded) * len(Graph.BUTTONS)))
+        self.__expanded = expanded
+        self.__saved = (count, expanded, len(self.__exits))
+        Logger.write(f'Done: #{count} screens restored from {self.__checkpoint.path}')
+        self.__crawl(None)
+
+    def crawl(self, entry: Screen) -> tuple[bytes, array.array, list[int]]:
+        self.__add(self.__get_hash(entry), entry)
+        self.__run_serial([entry], None)
+        return bytes(self.__nodes), self.__edges, [slot for slot, _ in self.__exits]
+
+    def __reset(self) -> None:
+        if self.__spill is not None:
+            self.__spill()
+        if self.__budget is None:
+            self.__indices = {}
+            self.__identities = {}
+            self.__nodes = bytearray()
+            self.__edges = array.array('i')
+        else:
+            directory = tempfile.mkdtemp(prefix='crawl-')
+            self.__spill = weakref.finalize(self, shutil.rmtree, directory, True)
+            self.__indices = Storage(self.__budget // 2 if self.__verify else self.__budget, os.path.join(directory, 'indices'))
+            self.__identities = Storage(self.__budget // 2, os.path.join(directory, 'identities'))
+            self.__nodes = Spool(os.path.join(directory, 'nodes.bin'), 'B')
+            self.__edges = Spool(os.path.join(directory, 'edges.bin'), 'i')
+        self.__exits = []
+        self.__expanded = 0
+        self.__saved = (0, 0, 0)
+
+    def __crawl(self, key: None | str) -> None:
+        entries = [
+            self.__screen.enter(index).mute() if self.__muted else self.__screen.enter(index)
+            for index in range(len(self.__screen.levels))
+        ]
+        hashes = [self.__get_hash(entry) for entry in entries]
+        followings = hashes[1:] + [self.__get_hash(self.__screen)]
+        if self.__get_hash(self.__screen) not in self.__indices:
+            self.__add(self.__get_hash(self.__screen), self.__screen)
+            self.__iterate(self.__screen, hashes[0])
+            Metrics.count('crawl.expanded')
+            Metrics.count('crawl.edges', len(self.__screen.actions))
+        pool = concurrent.futures.ProcessPoolExecutor(self.__workers) if self.__workers > 1 else contextlib.nullcontext()
+        with pool as executor:
+            queue = [
+                self.__get_screen(index)
+                for index in range(self.__expanded, len(self.__indices))
+            ]
+            pending = [index for index, entry_hash in enumerate(hashes) if entry_hash not in self.__indices]
+            if len(queue) == 1 and queue[0].get_hash() in hashes:
+                pending.insert(0, hashes.index(queue[0].get_hash()))
+                queue = []
+            if len(queue) > 0:
+                started = [index for index, entry_hash in enumerate(hashes) if entry_hash in self.__indices]
+                self.__explore(executor, queue, followings[started[-1]])
+            if self.__workers > 1 and self.__budget is None and len(pending) > 1:
+                self.__run_levels(executor, [entries[index] for index in pending], [followings[index] for index in pending])
+            else:
+                for index in pending:
+                    if hashes[index] not in self.__indices:
+                        self.__add(hashes[index], entries[index])
+                    self.__explore(executor, [entries[index]], followings[index])
+        if self.__checkpoint is not None:
+            self.__save(True)
+            self.__checkpoint.wait()
+        for slot, following in self.__exits:
+            self.__edges[slot] = self.__indices[following]
+        if self.__spill is None:
+            self.__screens = Graph(Graph.build(self.__nodes, self.__edges, self.__screen.levels, self.__width))
+        else:
+            self.__screens = self.__spill_graph()
+        self.__indices = {}
+        self.__identities = {}
+        self.__nodes = bytearray()
+        self.__edges = array.array('i')
+        self.__exits = []
+        Metrics.count('crawl.screens', len(self.__screens))
+        if key is not None:
+            self.__cache.put('crawl', key, self.__screens.buffer)
+        Logger.write(f'Done: #{len(self.__screens)} screens generated')
+
+    def __spill_graph(self) -> Graph:
+        directory = os.path.dirname(self.__nodes.path)
+        path = os.path.join(directory, 'graph.bin')
+        Graph.write(path, self.__nodes, self.__edges, self.__screen.levels, self.__width)
+        for storage in (self.__indices, self.__identities):
+            storage.close()
+            shutil.rmtree(storage.path, True)
+        for spool in (self.__nodes, self.__edges):
+            spool.close()
+            os.remove(spool.path)
+        self.__spill.detach()
+        self.__spill = None
+        screens = Graph.open(path)
+        weakref.finalize(screens, shutil.rmtree, directory, True)
+        return screens
+
+    def __explore(self, executor: None | concurrent.futures.Executor, queue: list[Screen], following: int) -> None:
+        if executor is None:
+            self.__run_serial(queue, following)
+        else:
+            self.__run_parallel(executor, queue, following)
+
+    def __save(self, force: bool = False) -> None:
+        if self.__checkpoint is None or not (force or self.__checkpoint.due()):
+            return
+        count, expanded, exits = self.__saved
+        self.__checkpoint.save((
+            bytes(self.__nodes[count * (Graph.NODE.size + self.__width):]),
+            self.__edges[expanded * len(Graph.BUTTONS):self.__expanded * len(Graph.BUTTONS)],
+            self.__exits[exits:],
+        ), (self.__digest, len(self.__indices), self.__expanded))
+        self.__saved = (len(self.__indices), self.__expanded, len(self.__exits))
+        Metrics.count('crawl.checkpoints')
+
+    def __run_serial(self, queue: list[Screen], following: None | int) -> None:
         while len(queue) > 0:
-            Logger.rewrite(f'Working: +{len(queue)} => #{len(self.__screens)} screens generated')
-            if len(self.__screens) >= 1_000_000:
+            Logger.rewrite(f'Working: +{len(queue)} => #{len(self.__indices)} screens generated')
+            if self.__budget is None and len(self.__indices) >= Crawler.LIMIT:
                 raise RuntimeError('Too many screens, aborting')
-            next_queue = {}
+            Metrics.peak('crawl.frontier', len(queue))
+            next_queue = []
+            edges = 0
             for screen in queue:
-                next_queue.update(self.__iterate(screen))
-            queue = list(next_queue.values())
-        Logger.write(f'Done: #{len(self.__screens)} screens generated')
+                next_queue += self.__iterate(screen, following)
+                edges += len(screen.actions)
+            Metrics.count('crawl.expanded', len(queue))
+            Metrics.count('crawl.edges', edges)
+            Metrics.count('crawl.known', edges - len(next_queue))
+            queue = next_queue
+            self.__save()
 
-    def __iterate(self, screen: Screen) -> dict[str, Screen]:
-        queue = {}
+    def __run_parallel(self, executor: concurrent.futures.Executor, queue: list[Screen], following: int) -> None:
+        while len(queue) > 0:
+            Logger.rewrite(f'Working: +{len(queue)} => #{len(self.__indices)} screens generated')
+            if self.__budget is None and len(self.__indices) >= Crawler.LIMIT:
+                raise RuntimeError('Too many screens, aborting')
+            Metrics.peak('crawl.frontier', len(queue))
+            shards: list[list[Screen]] = [[] for _ in range(self.__workers)]
+            for screen in queue:
+                shards[screen.get_hash() % self.__workers].append(screen)
+            expanded: dict[int, dict[Button, None | int]] = {}
+            discovered: dict[int, Screen] = {}
+            for shard_expanded, shard_discovered in executor.map(Crawler.expand, shards, itertools.repeat(self.__muted), itertools.repeat(self.__shared)):
+                expanded.update(shard_expanded)
+                discovered.update(shard_discovered)
+            next_queue = []
+            edges = 0
+            for screen in queue:
+                actions = expanded[screen.get_hash()]
+                next_queue += self.__link(screen.get_hash(), actions, discovered, following)
+                edges += len(actions)
+            Metrics.count('crawl.expanded', len(queue))
+            Metrics.count('crawl.edges', edges)
+            Metrics.count('crawl.known', edges - len(next_queue))
+            queue = next_queue
+            self.__save()
+
+    def __run_levels(self, executor: concurrent.futures.Executor, entries: list[Screen], followings: list[int]) -> None:
+        explored = executor.map(Crawler.explore, itertools.repeat(self.__screen.levels), entries, itertools.repeat(self.__verify), itertools.repeat(self.__muted), itertools.repeat(self.__shared))
+        record = Graph.NODE.size + self.__width
+        for (nodes, edges, exits), following in zip(explored, followings):
+            indices = array.array('i')
+            expanded = []
+            for index, (screen_hash,) in enumerate(struct.iter_unpack(f'<Q{record - 8}x', nodes)):
+                node = nodes[index * record:(index + 1) * record]
+                if screen_hash not in self.__indices:
+                    self.__add_record(screen_hash, node)
+                elif self.__get_record(self.__indices[screen_hash]) != node:
+                    raise RuntimeError(f'Hash collision on {screen_hash:016x}, aborting')
+                indices.append(self.__indices[screen_hash])
+                if indices[-1] >= self.__expanded:
+                    expanded.append(index)
+            count = 0
+            for index in expanded:
+                row = array.array('i', (
+                    indices[target] if target >= 0 else -1
+                    for target in edges[index * len(Graph.BUTTONS):(index + 1) * len(Graph.BUTTONS)]
+                ))
+                self.__edges[indices[index] * len(Graph.BUTTONS):(indices[index] + 1) * len(Graph.BUTTONS)] = row
+                count += len(row) - row.count(-1)
+            self.__exits.extend(
+                (indices[slot // len(Graph.BUTTONS)] * len(Graph.BUTTONS) + slot % len(Graph.BUTTONS), following)
+                for slot in exits
+                if indices[slot // len(Graph.BUTTONS)] >= self.__expanded
+            )
+            self.__expanded = len(self.__indices)
+            Logger.rewrite(f'Working: #{len(self.__indices)} screens generated')
+            if len(self.__indices) >= Crawler.LIMIT:
+                raise RuntimeError('Too many screens, aborting')
+            Metrics.count('crawl.expanded', len(expanded))
+            Metrics.count('crawl.edges', count + len(exits))
+            Metrics.count('crawl.known', count + len(exits) - len(expanded) + 1)
+            self.__save()
+
+    def __iterate(self, screen: Screen, following: None | int) -> list[Screen]:
+        discovered = {}
         actions = {}
         for action in screen.actions:
             next_screen = screen.handle(action)
-            next_hash = next_screen.get_hash()
-            if next_hash not in self.__screens:
-                queue[next_hash] = next_screen
+            if next_screen is None:
+                actions[action] = None
+                continue
+            next_screen = Crawler.__adapt(screen, next_screen, self.__muted, self.__shared)
+            next_hash = self.__get_hash(next_screen)
+            discovered.setdefault(next_hash, next_screen)
             actions[action] = next_hash
-        screen_hash = screen.get_hash()
-        self.__screens[screen_hash] = (screen, actions)
+        return self.__link(screen.get_hash(), actions, discovered, following)
+
+    def __link(self, screen_hash: int, actions: dict[Button, None | int], discovered: dict[int, Screen], following: None | int) -> list[Screen]:
+        queue = []
+        offset = self.__indices[screen_hash] * len(Graph.BUTTONS)
+        for action, next_hash in actions.items():
+            slot = offset + Graph.COLUMNS[action]
+            if next_hash is None:
+                self.__exits.append((slot, following))
+                continue
+            if next_hash not in self.__indices:
+                next_screen = discovered[next_hash]
+                self.__add(self.__get_hash(next_screen), next_screen)
+                queue.append(next_screen)
+            self.__edges[slot] = self.__indices[next_hash]
+        self.__expanded += 1
         return queue
+
+    def __add(self, screen_hash: int, screen: Screen) -> None:
+        self.__add_record(screen_hash, Graph.pack(screen_hash, screen, self.__width))
+
+    def __add_record(self, screen_hash: int, record: bytes) -> None:
+        self.__indices[screen_hash] = len(self.__indices)
+        self.__nodes += record
+        self.__edges.extend(Crawler.EMPTY)
+
+    def __get_screen(self, index: int) -> Screen:
+        return Graph.unpack(self.__get_record(index), self.__screen, self.__layouts)
+
+    def __get_record(self, index: int) -> bytes:
+        record = Graph.NODE.size + self.__width
+        return bytes(self.__nodes[index * record:(index + 1) * record])
+
+    def __get_hash(self, screen: Screen) -> int:
+        screen_hash = screen.get_hash()
+        if self.__verify:
+            identity = screen.get_bytes()
+            if screen_hash not in self.__identities:
+                self.__identities[screen_hash] = identity
+            elif self.__identities[screen_hash] != identity:
+                raise RuntimeError(f'Hash collision on {screen_hash:016x}, aborting')
+        return screen_hash
+
+    @staticmethod
+    def explore(levels: list[list[str]], entry: Screen, verify: bool, muted: bool, shared: bool) -> tuple[bytes, array.array, list[int]]:
+        return Crawler(levels, verify=verify, muted=muted, shared=shared).crawl(entry)
+
+    @staticmethod
+    def expand(screens: list[Screen], muted: bool, shared: bool) -> tuple[dict[int, dict[Button, None | int]], dict[int, Screen]]:
+        expanded = {}
+        discovered = {}
+        for screen in screens:
+            actions = {}
+            for action in screen.actions:
+                next_screen = screen.handle(action)
+                if next_screen is None:
+                    actions[action] = None
+                    continue
+                next_screen = Crawler.__adapt(screen, next_screen, muted, shared)
+                next_hash = next_screen.get_hash()
+                discovered.setdefault(next_hash, next_screen)
+                actions[action] = next_hash
+            expanded[screen.get_hash()] = actions
+        return expanded, discovered
+
+    @staticmethod
+    def __adapt(screen: Screen, next_screen: Screen, muted: bool, shared: bool) -> Screen:
+        if shared and isinstance(next_screen, DialogScreen):
+            next_screen = next_screen.share(screen)
+        return next_screen.mute() if muted else next_screen
@@ -0,0 +1,182 @@
+import collections
+import os
+from model.entity.position import Position
+from model.entity.state import State
+from model.enum.cell import Cell
+from util.logger import Logger
+
+
+class Estimator:
+
+    LIMIT = 20_000
+    VARIANTS = 11
+    SLIDE_BYTES = 1800
+    BASE_BYTES = 40_000
+    COLLECTIBLES = (Cell.KEY, Cell.GEM)
+    BARRIERS = (Cell.LOCK, Cell.DRAGON)
+    BLOCKING = (Cell.WALL, Cell.PRINCESS, Cell.LOCK, Cell.DRAGON)
+    STEPS = ((0, -1), (-1, 0), (1, 0), (0, 1))
+
+    def __init__(self, level: list[str], assets: None | dict[str, str] = None):
+        self.__state = State.create(level)
+        self.__assets = assets or {}
+        self.__grid = self.__state.level.grid
+        self.__regions: dict[tuple[int, int], int] = {}
+        self.__sizes: list[int] = []
+        self.__weights: list[int] = []
+        self.__items: list[tuple[tuple[int, int], Cell, int]] = []
+        self.__barriers: list[tuple[tuple[int, int], Cell, frozenset[int], dict[int, int]]] = []
+        self.__configurations = 0
+        self.__positions = 0
+        self.__estimate = 0
+        self.__exceeded = False
+        self.__hotspots: list[tuple[Position, Cell, float]] = []
+
+    @property
+    def configurations(self) -> int:
+        return self.__configurations
+
+    @property
+    def exceeded(self) -> bool:
+        return self.__exceeded
+
+    @property
+    def bound(self) -> int:
+        return 1 + self.__positions * Estimator.VARIANTS
+
+    @property
+    def estimate(self) -> int:
+        return 1 + self.__estimate
+
+    @property
+    def slides(self) -> int:
+        return self.estimate
+
+    @property
+    def size(self) -> int:
+        media = sum(
+            os.path.getsize(path)
+            for path in set(self.__assets.values())
+            if os.path.isfile(path)
+        )
+        return Estimator.BASE_BYTES + media + self.slides * Estimator.SLIDE_BYTES
+
+    @property
+    def hotspots(self) -> list[tuple[Position, Cell, float]]:
+        return self.__hotspots
+
+    def run(self) -> None:
+        self.__partition()
+        seen, self.__positions, self.__estimate, self.__exceeded = self.__explore()
+        self.__configurations = len(seen)
+        self.__hotspots = []
+        for offset, elements in ((0, self.__items), (1, self.__barriers)):
+            for index, element in enumerate(elements):
+                missing = sum(1 for configuration in seen if index not in configuration[offset])
+                self.__hotspots.append((Position(*element[0]), element[1], len(seen) / max(1, missing)))
+        self.__hotspots.sort(key=lambda hotspot: -hotspot[2])
+        Logger.write(f'Done: ~#{self.estimate} screens estimated, #{self.bound} {"at least" if self.__exceeded else "at most"}')
+
+    def __partition(self) -> None:
+        self.__regions = {}
+        self.__sizes = []
+        self.__weights = []
+        for top, line in enumerate(self.__grid):
+            for left, cell in enumerate(line):
+                if cell in Estimator.BLOCKING or (left, top) in self.__regions:
+                    continue
+                region = len(self.__weights)
+                self.__sizes.append(0)
+                self.__weights.append(0)
+                stack = [(left, top)]
+                self.__regions[left, top] = region
+                while len(stack) > 0:
+                    current = stack.pop()
+                    self.__sizes[region] += 1
+                    self.__weights[region] += self.__weigh(current)
+                    for neighbour in self.__neighbours(current):
+                        if self.__get(neighbour) not in Estimator.BLOCKING and neighbour not in self.__regions:
+                            self.__regions[neighbour] = region
+                            stack.append(neighbour)
+        self.__items = [
+            ((left, top), cell, self.__regions[left, top])
+            for top, line in enumerate(self.__grid)
+            for left, cell in enumerate(line)
+            if cell in Estimator.COLLECTIBLES
+        ]
+        self.__barriers = []
+        for top, line in enumerate(self.__grid):
+            for left, cell in enumerate(line):
+                if cell not in Estimator.BARRIERS:
+                    continue
+                touches: dict[int, int] = {}
+                for neighbour in self.__neighbours((left, top)):
+                    if neighbour in self.__regions:
+                        touches[self.__regions[neighbour]] = touches.get(self.__regions[neighbour], 0) + 1
+                self.__barriers.append(((left, top), cell, frozenset(touches.keys()), touches))
+
+    def __explore(self) -> tuple[set[tuple[frozenset[int], frozenset[int]]], int, int, bool]:
+        start_region = self.__regions[self.__state.position.left, self.__state.position.top]
+        items = self.__items
+        barriers = self.__barriers
+        start = (frozenset(), frozenset())
+        seen = {start}
+        queue = collections.deque([start])
+        positions = 0
+        estimate = 0
+        while len(queue) > 0:
+            if len(seen) > Estimator.LIMIT:
+                return seen, positions, estimate, True
+            collected, opened = queue.popleft()
+            regions = {start_region}
+            changed = True
+            while changed:
+                changed = False
+                for index in opened:
+                    if not barriers[index][2] <= regions:
+                        regions |= barriers[index][2]
+                        changed = True
+            keys = sum(1 for index in collected if items[index][1] == Cell.KEY)
+            keys -= sum(1 for index in opened if barriers[index][1] == Cell.LOCK)
+            gems = sum(1 for index in collected if items[index][1] == Cell.GEM)
+            gems -= 3 * sum(1 for index in opened if barriers[index][1] == Cell.DRAGON)
+            positions += sum(self.__sizes[region] for region in regions) + len(opened)
+            estimate += sum(self.__weights[region] for region in regions) + len(opened)
+            for index, (_, _, region) in enumerate(items):
+                if region in regions and index not in collected:
+                    positions -= 1
+                    estimate -= 1
+                    following = (collected | {index}, opened)
+                    if following not in seen:
+                        seen.add(following)
+                        queue.append(following)
+            for index, (_, cell, touched, touches) in enumerate(barriers):
+                if index in opened or not touched & regions:
+                    continue
+                estimate += 2 * sum(count for region, count in touches.items() if region in regions)
+                if (cell == Cell.LOCK and keys >= 1) or (cell == Cell.DRAGON and gems >= 3):
+                    following = (collected, opened | {index})
+                    if following not in seen:
+                        seen.add(following)
+                        queue.append(following)
+        return seen, positions, estimate, False
+
+    def __weigh(self, position: tuple[int, int]) -> int:
+        weight = 1
+        neighbours = [self.__get(neighbour) for neighbour in self.__neighbours(position)]
+        if Cell.WALL in neighbours:
+            weight += 1
+        if Cell.PRINCESS in neighbours:
+            weight += 2
+        return weight
+
+    def __neighbours(self, position: tuple[int, int]) -> list[tuple[int, int]]:
+        left, top = position
+        return [
+            (left + step_left, top + step_top)
+            for step_left, step_top in Estimator.STEPS
+            if 0 <= top + step_top < len(self.__grid) and 0 <= left + step_left < len(self.__grid[top + step_top])
+        ]
+
+    def __get(self, position: tuple[int, int]) -> Cell:
+        return self.__grid[position[1]][position[0]]
@@ -0,0 +1,310 @@
+import array
+import collections.abc
+import contextlib
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import typing
+from model.entity.inventory import Inventory
+from model.entity.layout import Layout
+from model.entity.level import Level
+from model.entity.position import Position
+from model.entity.screen import DialogScreen, MainScreen, MazeScreen, MessageScreen, Screen
+from model.entity.state import State
+from model.enum.asset.message import Message
+from model.enum.asset.music import Music
+from model.enum.asset.sound import Sound
+from model.enum.button import Button
+from model.enum.effect import Effect
+
+
+class Graph(collections.abc.Mapping):
+
+    MAGIC = b'PPGRAPH\x00'
+    VERSION = 2
+    HEADER = struct.Struct('<8s2H2I4Q')
+    NODE = struct.Struct('<Q5BH2h2H')
+    RANK = struct.Struct('<Qi')
+    CHUNK = 1 << 14
+    NONE = 0xFFFF
+    KINDS = (MainScreen, MazeScreen, DialogScreen, MessageScreen)
+    BUTTONS = list(Button)
+    COLUMNS = {button: column for column, button in enumerate(BUTTONS)}
+    SOUNDS = list(Sound)
+    MUSICS = list(Music)
+    EFFECTS = list(Effect)
+    MESSAGES = list(Message)
+
+    def __init__(self, buffer: bytes | mmap.mmap):
+        self.__buffer = buffer
+        magic, version, buttons, self.__count, self.__width, nodes, edges, order, meta = Graph.HEADER.unpack_from(self.__buffer)
+        if magic != Graph.MAGIC or version != Graph.VERSION or buttons != len(Graph.BUTTONS):
+            raise ValueError('Unsupported screen graph')
+        self.__record = Graph.NODE.size + self.__width
+        self.__nodes = nodes
+        view = memoryview(self.__buffer)
+        self.__links = view[edges:edges + self.__count * buttons * 4].cast('i')
+        self.__order = view[order:order + self.__count * 4].cast('i')
+        self.__levels: list[list[str]] = json.loads(bytes(self.__buffer[meta:]))['levels']
+        self.__main = MainScreen(self.__levels)
+        self.__layouts, _ = Graph.get_layouts(self.__levels)
+
+    @property
+    def buffer(self) -> bytes | mmap.mmap:
+        return self.__buffer
+
+    @property
+    def levels(self) -> list[list[str]]:
+        return self.__levels
+
+    @property
+    def edges(self) -> memoryview:
+        return self.__links.cast('B').cast('i', (self.__count, len(Graph.BUTTONS)))
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, int) and self.get_index(key) is not None
+
+    def __getitem__(self, key: int) -> tuple[Screen, dict[Button, int]]:
+        index = self.get_index(key)
+        if index is None:
+            raise KeyError(key)
+        return self.get_item(index)
+
+    def __iter__(self) -> typing.Iterator[int]:
+        for index in range(self.__count):
+            yield self.get_hash(index)
+
+    def values(self) -> collections.abc.ValuesView:
+        return GraphValues(self)
+
+    def items(self) -> collections.abc.ItemsView:
+        return GraphItems(self)
+
+    def close(self) -> None:
+        self.__links.release()
+        self.__order.release()
+        if isinstance(self.__buffer, mmap.mmap):
+            self.__buffer.close()
+
+    def get_hash(self, index: int) -> int:
+        return Graph.NODE.unpack_from(self.__buffer, self.__nodes + index * self.__record)[0]
+
+    def get_index(self, key: int) -> None | int:
+        low, high = 0, self.__count
+        while low < high:
+            middle = (low + high) // 2
+            if self.get_hash(self.__order[middle]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.__count and self.get_hash(self.__order[low]) == key:
+            return self.__order[low]
+        return None
+
+    def get_item(self, index: int) -> tuple[Screen, dict[Button, int]]:
+        return self.get_screen(index), {
+            button: self.get_hash(target)
+            for button, target in self.get_links(index).items()
+        }
+
+    def get_links(self, index: int) -> dict[Button, int]:
+        offset = index * len(Graph.BUTTONS)
+        return {
+            button: self.__links[offset + position]
+            for position, button in enumerate(Graph.BUTTONS)
+            if self.__links[offset + position] >= 0
+        }
+
+    def get_screen(self, index: int) -> Screen:
+        offset = self.__nodes + index * self.__record
+        return Graph.unpack(self.__buffer[offset:offset + self.__record], self.__main, self.__layouts)
+
+    @staticmethod
+    def open(path: str) -> 'Graph':
+        with open(path, 'rb') as file:
+            return Graph(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @staticmethod
+    def save(screens: typing.Mapping[int, tuple[Screen, dict[Button, int]]], levels: list[list[str]], path: str) -> None:
+        if isinstance(screens, Graph):
+            blob = screens.buffer
+        else:
+            _, width = Graph.get_layouts(levels)
+            indices = {
+                screen_hash: index
+                for index, screen_hash in enumerate(screens.keys())
+            }
+            nodes = bytearray()
+            edges = array.array('i')
+            for screen_hash, (screen, actions) in screens.items():
+                nodes += Graph.pack(screen_hash, screen, width)
+                edges.extend(
+                    indices[actions[button]] if button in actions else -1
+                    for button in Graph.BUTTONS
+                )
+            blob = Graph.build(nodes, edges, levels, width)
+        temporary = f'{path}.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(blob)
+        os.replace(temporary, path)
+
+    @staticmethod
+    def build(nodes: bytes | bytearray, edges: array.array, levels: list[list[str]], width: int) -> bytes:
+        record = Graph.NODE.size + width
+        count = len(nodes) // record
+        hashes = [key for key, in struct.iter_unpack(f'<Q{record - 8}x', nodes)]
+        start, links, order, meta = Graph.__get_offsets(count, len(nodes))
+        ranks = array.array('i', sorted(range(count), key=hashes.__getitem__))
+        if sys.byteorder != 'little':
+            edges = array.array('i', edges)
+            edges.byteswap()
+            ranks.byteswap()
+        blob = bytearray(meta)
+        Graph.HEADER.pack_into(blob, 0, Graph.MAGIC, Graph.VERSION, len(Graph.BUTTONS), count, width, start, links, order, meta)
+        blob[start:start + len(nodes)] = nodes
+        blob[links:links + count * len(Graph.BUTTONS) * 4] = edges.tobytes()
+        blob[order:order + count * 4] = ranks.tobytes()
+        blob += Graph.__get_meta(levels)
+        return bytes(blob)
+
+    @staticmethod
+    def write(path: str, nodes: typing.Sequence[int], edges: typing.Sequence[int], levels: list[list[str]], width: int) -> None:
+        record = Graph.NODE.size + width
+        count = len(nodes) // record
+        start, links, order, meta = Graph.__get_offsets(count, len(nodes))
+        header = bytearray(start)
+        Graph.HEADER.pack_into(header, 0, Graph.MAGIC, Graph.VERSION, len(Graph.BUTTONS), count, width, start, links, order, meta)
+        temporary = f'{path}.tmp'
+        with open(temporary, 'wb') as file, contextlib.ExitStack() as stack:
+            file.write(header)
+            runs = []
+            for offset in range(0, count, Graph.CHUNK):
+                chunk = nodes[offset * record:(offset + Graph.CHUNK) * record]
+                file.write(chunk)
+                hashes = [key for key, in struct.iter_unpack(f'<Q{record - 8}x', chunk)]
+                run = stack.enter_context(tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(path))))
+                for index in sorted(range(len(hashes)), key=hashes.__getitem__):
+                    run.write(Graph.RANK.pack(hashes[index], offset + index))
+                run.seek(0)
+                runs.append(Graph.__read_run(run))
+            file.write(bytes(links - file.tell()))
+            for offset in range(0, count * len(Graph.BUTTONS), Graph.CHUNK):
+                chunk = array.array('i', edges[offset:offset + Graph.CHUNK])
+                if sys.byteorder != 'little':
+                    chunk.byteswap()
+                file.write(chunk.tobytes())
+            file.write(bytes(order - file.tell()))
+            ranks = array.array('i')
+            for _, index in heapq.merge(*runs):
+                ranks.append(index)
+                if len(ranks) == Graph.CHUNK:
+                    Graph.__write_ranks(file, ranks)
+            Graph.__write_ranks(file, ranks)
+            file.write(bytes(meta - file.tell()))
+            file.write(Graph.__get_meta(levels))
+        os.replace(temporary, path)
+
+    @staticmethod
+    def get_layouts(levels: list[list[str]]) -> tuple[list[Layout], int]:
+        main = MainScreen(levels)
+        layouts = [main.enter(index).state.level.layout for index in range(len(levels))]
+        return layouts, max(((len(layout.positions) * Layout.BITS + 7) // 8 for layout in layouts), default=0)
+
+    @staticmethod
+    def pack(screen_hash: int, screen: Screen, width: int) -> bytes:
+        kind = Graph.KINDS.index(type(screen))
+        message = Graph.MESSAGES.index(screen.message) if isinstance(screen, (DialogScreen, MessageScreen)) else 0xFF
+        if isinstance(screen, (MainScreen, MessageScreen)):
+            return Graph.NODE.pack(screen_hash, kind, Graph.SOUNDS.index(screen.sound), Graph.MUSICS.index(screen.music), Graph.EFFECTS.index(screen.effect), message, Graph.NONE, 0, 0, 0, 0) + bytes(width)
+        state = screen.state
+        return Graph.NODE.pack(
+            screen_hash,
+            kind,
+            Graph.SOUNDS.index(screen.sound),
+            Graph.MUSICS.index(screen.music),
+            Graph.EFFECTS.index(screen.effect),
+            message,
+            state.level.layout.index,
+            state.position.left,
+            state.position.top,
+            state.inventory.keys,
+            state.inventory.gems,
+        ) + state.level.cells.to_bytes(width, 'little')
+
+    @staticmethod
+    def unpack(record: bytes, main: MainScreen, layouts: list[Layout]) -> Screen:
+        _, kind, sound, _, effect, message, level, left, top, keys, gems = Graph.NODE.unpack_from(record)
+        if Graph.KINDS[kind] is MainScreen:
+            return main
+        if Graph.KINDS[kind] is MessageScreen:
+            return MessageScreen(Graph.SOUNDS[sound], Graph.MESSAGES[message])
+        state = State(
+            level=Level.restore(layouts[level], int.from_bytes(record[Graph.NODE.size:], 'little')),
+            position=Position(left, top),
+            inventory=Inventory(keys=keys, gems=gems)
+        )
+        if Graph.KINDS[kind] is MazeScreen:
+            return MazeScreen(Graph.SOUNDS[sound], Graph.EFFECTS[effect], state)
+        return DialogScreen(Graph.SOUNDS[sound], state, Graph.MESSAGES[message])
+
+    @staticmethod
+    def __get_offsets(count: int, size: int) -> tuple[int, int, int, int]:
+        start = Graph.__align(Graph.HEADER.size)
+        links = Graph.__align(start + size)
+        order = Graph.__align(links + count * len(Graph.BUTTONS) * 4)
+        return start, links, order, Graph.__align(order + count * 4)
+
+    @staticmethod
+    def __get_meta(levels: list[list[str]]) -> bytes:
+        return json.dumps({
+            'buttons': Graph.BUTTONS,
+            'kinds': [kind.__name__ for kind in Graph.KINDS],
+            'sounds': Graph.SOUNDS,
+            'musics': Graph.MUSICS,
+            'effects': Graph.EFFECTS,
+            'messages': Graph.MESSAGES,
+            'cells': Layout.CELLS,
+            'bits': Layout.BITS,
+            'node': Graph.NODE.format,
+            'levels': levels,
+        }, ensure_ascii=False).encode()
+
+    @staticmethod
+    def __read_run(run: typing.BinaryIO) -> typing.Iterator[tuple[int, int]]:
+        while True:
+            chunk = run.read(Graph.RANK.size * Graph.CHUNK)
+            if len(chunk) == 0:
+                return
+            yield from Graph.RANK.iter_unpack(chunk)
+
+    @staticmethod
+    def __write_ranks(file: typing.BinaryIO, ranks: array.array) -> None:
+        if sys.byteorder != 'little':
+            ranks.byteswap()
+        file.write(ranks.tobytes())
+        del ranks[:]
+
+    @staticmethod
+    def __align(offset: int) -> int:
+        return (offset + 7) & ~7
+
+
+class GraphValues(collections.abc.ValuesView):
+
+    def __iter__(self) -> typing.Iterator[tuple[Screen, dict[Button, int]]]:
+        for index in range(len(self._mapping)):
+            yield self._mapping.get_item(index)
+
+
+class GraphItems(collections.abc.ItemsView):
+
+    def __iter__(self) -> typing.Iterator[tuple[int, tuple[Screen, dict[Button, int]]]]:
+        for index in range(len(self._mapping)):
+            yield self._mapping.get_hash(index), self._mapping.get_item(index)
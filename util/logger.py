@@ -1,10 +1,20 @@
+import time
+
 
 class Logger:
 
+    INTERVAL = 0.2
+    __last = 0.0
+
     @staticmethod
     def write(message: str) -> None:
         print(f'\033[2K{message}')
+        Logger.__last = 0.0
 
     @staticmethod
     def rewrite(message: str) -> None:
+        now = time.monotonic()
+        if now - Logger.__last < Logger.INTERVAL:
+            return
+        Logger.__last = now
         print(f'\033[2K{message}', end='\r', flush=True)
@@ -8,7 +8,7 @@ class Logic:
 
     @staticmethod
     def iterate(prev_state: State, next_state: State) -> tuple[Sound, State, None | Message]:
-        cell = next_state.level.grid[next_state.position.top][next_state.position.left]
+        cell = next_state.level.get(next_state.position)
         methods = {
             Cell.WALL: Logic.__iterate__wall,
             Cell.SPACE: Logic.__iterate__space,
@@ -75,5 +75,8 @@ class Logic:
             return Sound.DRAGON_ROAR, prev_state, Message.DRAGON_BLOCK
 
     @staticmethod
-    def __iterate__princess(prev_state: State, _: State) -> tuple[Sound, State, None | Message]:
-        return Sound.PRINCESS_LAUGH, prev_state, Message.PRINCESS_MESSAGE
+    def __iterate__princess(prev_state: State, next_state: State) -> tuple[Sound, State, None | Message]:
+        if next_state.inventory.gems >= 3:
+            return Sound.PRINCESS_LAUGH, prev_state, Message.PRINCESS_RESCUED
+        else:
+            return Sound.PRINCESS_LAUGH, prev_state, Message.PRINCESS_MESSAGE
@@ -0,0 +1,69 @@
+import random
+from model.enum.cell import Cell
+
+
+class Maze:
+
+    @staticmethod
+    def generate(width: int, height: int, keys: int = 0, gems: int = 0, dragons: int = 0, loops: int = 0, seed: int = 0) -> list[str]:
+        if width < 5 or height < 5 or width % 2 == 0 or height % 2 == 0:
+            raise ValueError(f'Invalid maze size {width}x{height}, expected odd sizes of at least 5')
+        generator = random.Random(seed)
+        grid = [[Cell.WALL for _ in range(width)] for _ in range(height)]
+        grid[1][1] = Cell.SPACE
+        stack = [(1, 1)]
+        while len(stack) > 0:
+            left, top = stack[-1]
+            neighbours = [
+                (left + step_left, top + step_top)
+                for step_left, step_top in ((0, -2), (-2, 0), (2, 0), (0, 2))
+                if 0 < left + step_left < width - 1 and 0 < top + step_top < height - 1
+                and grid[top + step_top][left + step_left] == Cell.WALL
+            ]
+            if len(neighbours) == 0:
+                stack.pop()
+                continue
+            next_left, next_top = generator.choice(neighbours)
+            grid[(top + next_top) // 2][(left + next_left) // 2] = Cell.SPACE
+            grid[next_top][next_left] = Cell.SPACE
+            stack.append((next_left, next_top))
+        walls = [
+            (left, top)
+            for top in range(1, height - 1)
+            for left in range(1, width - 1)
+            if (left + top) % 2 == 1 and grid[top][left] == Cell.WALL
+        ]
+        for left, top in generator.sample(walls, min(loops, len(walls))):
+            grid[top][left] = Cell.SPACE
+        rooms = [
+            (left, top)
+            for top in range(1, height - 1, 2)
+            for left in range(1, width - 1, 2)
+            if (left, top) != (1, 1)
+        ]
+        passages = [
+            (left, top)
+            for top in range(1, height - 1)
+            for left in range(1, width - 1)
+            if (left + top) % 2 == 1 and grid[top][left] == Cell.SPACE
+        ]
+        if keys + gems + 1 > len(rooms) or keys + dragons > len(passages):
+            raise ValueError(f'Too many items for maze size {width}x{height}')
+        generator.shuffle(rooms)
+        generator.shuffle(passages)
+        left, top = rooms.pop()
+        grid[top][left] = Cell.PRINCESS
+        grid[1][1] = Cell.WIZARD
+        for cell, count, cells in (
+            (Cell.KEY, keys, rooms),
+            (Cell.GEM, gems, rooms),
+            (Cell.LOCK, keys, passages),
+            (Cell.DRAGON, dragons, passages),
+        ):
+            for _ in range(count):
+                left, top = cells.pop()
+                grid[top][left] = cell
+        return [
+            ''.join(line)
+            for line in grid
+        ]
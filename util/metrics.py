@@ -0,0 +1,86 @@
+import contextlib
+import cProfile
+import json
+import sys
+import time
+import tracemalloc
+import typing
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class Metrics:
+
+    RATIOS = {
+        'crawl.dedupe_rate': ('crawl.known', 'crawl.edges'),
+        'crawl.branching_factor': ('crawl.edges', 'crawl.expanded'),
+        'compose.shapes_per_slide': ('compose.shapes', 'compose.slides'),
+    }
+    __phases: dict[str, dict[str, float]] = {}
+    __counters: dict[str, float] = {}
+    __profiler: None | cProfile.Profile = None
+
+    @staticmethod
+    def enable(profile: bool = False, trace: bool = False) -> None:
+        if profile and Metrics.__profiler is None:
+            Metrics.__profiler = cProfile.Profile()
+            Metrics.__profiler.enable()
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @staticmethod
+    @contextlib.contextmanager
+    def phase(name: str) -> typing.Iterator[None]:
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            phase = Metrics.__phases.setdefault(name, {'wall': 0.0, 'cpu': 0.0, 'calls': 0})
+            phase['wall'] += time.perf_counter() - wall
+            phase['cpu'] += time.process_time() - cpu
+            phase['calls'] += 1
+
+    @staticmethod
+    def count(name: str, value: float = 1) -> None:
+        Metrics.__counters[name] = Metrics.__counters.get(name, 0) + value
+
+    @staticmethod
+    def peak(name: str, value: float) -> None:
+        Metrics.__counters[name] = max(Metrics.__counters.get(name, value), value)
+
+    @staticmethod
+    def get(name: str) -> float:
+        return Metrics.__counters.get(name, 0)
+
+    @staticmethod
+    def report() -> dict[str, typing.Any]:
+        counters = dict(Metrics.__counters)
+        for name, (numerator, denominator) in Metrics.RATIOS.items():
+            if Metrics.get(denominator) > 0:
+                counters[name] = Metrics.get(numerator) / Metrics.get(denominator)
+        memory: dict[str, typing.Any] = {}
+        if resource is not None:
+            memory['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1 << 20 if sys.platform == 'darwin' else 1 << 10)
+        if tracemalloc.is_tracing():
+            memory['traced_peak_mb'] = tracemalloc.get_traced_memory()[1] / (1 << 20)
+            memory['allocations'] = [
+                {'site': str(statistic.traceback), 'size_mb': statistic.size / (1 << 20), 'count': statistic.count}
+                for statistic in tracemalloc.take_snapshot().statistics('lineno')[:10]
+            ]
+        return {
+            'phases': Metrics.__phases,
+            'counters': counters,
+            'memory': memory,
+        }
+
+    @staticmethod
+    def save(path: str) -> None:
+        if Metrics.__profiler is not None:
+            Metrics.__profiler.disable()
+            Metrics.__profiler.dump_stats(f'{path}.prof')
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(Metrics.report(), file, indent=4)
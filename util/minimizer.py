@@ -0,0 +1,64 @@
+import array
+import typing
+from model.entity.screen import Screen
+from model.enum.button import Button
+from util.graph import Graph
+from util.logger import Logger
+
+
+class Minimizer:
+
+    def __init__(self, screens: Graph):
+        self.__input = screens
+        self.__screens: dict[int, tuple[Screen, dict[Button, int]]] = {}
+        self.__merged = 0
+
+    @property
+    def screens(self) -> dict[int, tuple[Screen, dict[Button, int]]]:
+        return self.__screens
+
+    @property
+    def merged(self) -> int:
+        return self.__merged
+
+    def run(self) -> None:
+        count = len(self.__input)
+        columns = len(Graph.BUTTONS)
+        links = self.__input.edges.cast('B').cast('i')
+        blocks = Minimizer.__partition(
+            self.__input.get_screen(index).get_view()
+            for index in range(count)
+        )
+        classes = max(blocks, default=-1) + 1
+        while True:
+            Logger.rewrite(f'Working: #{classes} screen classes refined')
+            blocks = Minimizer.__partition(
+                (blocks[index], tuple(
+                    -1 if target < 0 else blocks[target]
+                    for target in links[index * columns:(index + 1) * columns]
+                ))
+                for index in range(count)
+            )
+            next_classes = max(blocks, default=-1) + 1
+            if next_classes == classes:
+                break
+            classes = next_classes
+        representatives: dict[int, int] = {}
+        for index, block in enumerate(blocks):
+            representatives.setdefault(block, index)
+        self.__screens = {}
+        for index in representatives.values():
+            self.__screens[self.__input.get_hash(index)] = (self.__input.get_screen(index), {
+                button: self.__input.get_hash(representatives[blocks[target]])
+                for button, target in self.__input.get_links(index).items()
+            })
+        self.__merged = count - len(self.__screens)
+        Logger.write(f'Done: #{self.__merged} screens merged')
+
+    @staticmethod
+    def __partition(signatures: typing.Iterable[object]) -> array.array:
+        blocks: dict[object, int] = {}
+        return array.array('i', (
+            blocks.setdefault(signature, len(blocks))
+            for signature in signatures
+        ))
@@ -0,0 +1,44 @@
+import hashlib
+import io
+import math
+import PIL, PIL.Image
+from util.cache import Cache
+
+
+class Optimizer:
+
+    DPI = 96
+    EMU = 914400
+
+    def __init__(self, dpi: int = DPI, cache: None | Cache = None):
+        self.__dpi = dpi
+        self.__cache = cache
+
+    @property
+    def dpi(self) -> int:
+        return self.__dpi
+
+    def run(self, blob: bytes, width: float, height: float) -> bytes:
+        size = (
+            max(1, math.ceil(width / Optimizer.EMU * self.__dpi)),
+            max(1, math.ceil(height / Optimizer.EMU * self.__dpi)),
+        )
+        key = Cache.digest('asset', hashlib.sha1(blob).hexdigest(), size, PIL.__version__)
+        if self.__cache is not None:
+            record = self.__cache.get('assets', key)
+            if record is not None:
+                return record
+        image = PIL.Image.open(io.BytesIO(blob))
+        original = image.size
+        target = (min(image.width, size[0]), min(image.height, size[1]))
+        if target != original:
+            image = image.resize(target, PIL.Image.Resampling.NEAREST)
+        image.info.pop('icc_profile', None)
+        output = io.BytesIO()
+        image.save(output, 'PNG', optimize=True)
+        result = output.getvalue()
+        if len(result) >= len(blob):
+            result = blob
+        if self.__cache is not None:
+            self.__cache.put('assets', key, result)
+        return result
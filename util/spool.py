@@ -0,0 +1,73 @@
+import array
+import mmap
+import typing
+
+
+class Spool:
+
+    CAPACITY = 1 << 16
+
+    def __init__(self, path: str, typecode: str):
+        self.__path = path
+        self.__typecode = typecode
+        self.__itemsize = array.array(typecode).itemsize
+        self.__file = open(path, 'w+b')
+        self.__length = 0
+        self.__capacity = 0
+        self.__map: None | mmap.mmap = None
+        self.__view: None | memoryview = None
+        self.__resize(Spool.CAPACITY)
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    def __len__(self) -> int:
+        return self.__length
+
+    def __getitem__(self, key: int | slice) -> typing.Any:
+        if not isinstance(key, slice):
+            if not 0 <= key < self.__length:
+                raise IndexError(key)
+            return self.__view[key]
+        start, stop, step = key.indices(self.__length)
+        if step != 1:
+            raise ValueError('Spools only support contiguous slices')
+        values = array.array(self.__typecode)
+        values.frombytes(self.__map[start * self.__itemsize:max(start, stop) * self.__itemsize])
+        return values
+
+    def __setitem__(self, key: int, value: int) -> None:
+        if not 0 <= key < self.__length:
+            raise IndexError(key)
+        self.__view[key] = value
+
+    def __iadd__(self, values: typing.Iterable) -> 'Spool':
+        self.extend(values)
+        return self
+
+    def extend(self, values: typing.Iterable) -> None:
+        if not isinstance(values, (bytes, bytearray, array.array)):
+            values = array.array(self.__typecode, values)
+        count = len(values)
+        if self.__length + count > self.__capacity:
+            self.__resize(max(self.__capacity * 2, self.__length + count))
+        self.__view[self.__length:self.__length + count] = values
+        self.__length += count
+
+    def close(self) -> None:
+        if self.__view is not None:
+            self.__view.release()
+            self.__map.close()
+            self.__view = None
+            self.__map = None
+        self.__file.close()
+
+    def __resize(self, capacity: int) -> None:
+        if self.__view is not None:
+            self.__view.release()
+            self.__map.close()
+        self.__file.truncate(capacity * self.__itemsize)
+        self.__map = mmap.mmap(self.__file.fileno(), capacity * self.__itemsize)
+        self.__view = memoryview(self.__map).cast(self.__typecode)
+        self.__capacity = capacity
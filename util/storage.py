@@ -0,0 +1,121 @@
+import collections
+import collections.abc
+import mmap
+import os
+import pickle
+import shutil
+import struct
+import sys
+import tempfile
+import typing
+import weakref
+
+
+class Storage(collections.abc.Mapping):
+
+    ENTRY = 200
+    SLOT = struct.Struct('<QQQ')
+    KEY = struct.Struct('<Q')
+
+    def __init__(self, budget: int, path: None | str = None):
+        self.__path = tempfile.mkdtemp(prefix='crawl-') if path is None else path
+        os.makedirs(self.__path, exist_ok=True)
+        if path is None:
+            weakref.finalize(self, shutil.rmtree, self.__path, True)
+        self.__budget = budget
+        self.__records = open(os.path.join(self.__path, 'records.bin'), 'w+b')
+        self.__order = open(os.path.join(self.__path, 'order.bin'), 'w+b')
+        self.__size = 0
+        self.__count = 0
+        self.__capacity = 0
+        self.__index: None | mmap.mmap = None
+        self.__cache: collections.OrderedDict[int, tuple[object, int]] = collections.OrderedDict()
+        self.__cached = 0
+        self.__resize(1 << 16)
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, int):
+            return False
+        return key in self.__cache or self.__find(key)[1] != 0
+
+    def __getitem__(self, key: int) -> typing.Any:
+        if key in self.__cache:
+            self.__cache.move_to_end(key)
+            return self.__cache[key][0]
+        _, offset, length = self.__find(key)
+        if offset == 0:
+            raise KeyError(key)
+        self.__records.seek(offset - 1)
+        value = pickle.loads(self.__records.read(length))
+        self.__remember(key, value)
+        return value
+
+    def __setitem__(self, key: int, value: object) -> None:
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        slot, offset, _ = self.__find(key)
+        self.__records.seek(self.__size)
+        self.__records.write(data)
+        Storage.SLOT.pack_into(self.__index, slot * Storage.SLOT.size, key, self.__size + 1, len(data))
+        self.__size += len(data)
+        if offset == 0:
+            self.__order.seek(self.__count * Storage.KEY.size)
+            self.__order.write(Storage.KEY.pack(key))
+            self.__count += 1
+            if self.__count * 2 > self.__capacity:
+                self.__resize(self.__capacity * 2)
+        self.__remember(key, value)
+
+    def __iter__(self) -> typing.Iterator[int]:
+        for index in range(0, self.__count, 4096):
+            self.__order.seek(index * Storage.KEY.size)
+            chunk = self.__order.read(min(4096, self.__count - index) * Storage.KEY.size)
+            for (key,) in Storage.KEY.iter_unpack(chunk):
+                yield key
+
+    def close(self) -> None:
+        self.__cache.clear()
+        self.__records.close()
+        self.__order.close()
+        if self.__index is not None:
+            self.__index.close()
+
+    def __find(self, key: int) -> tuple[int, int, int]:
+        mask = self.__capacity - 1
+        slot = key & mask
+        while True:
+            slot_key, offset, length = Storage.SLOT.unpack_from(self.__index, slot * Storage.SLOT.size)
+            if offset == 0 or slot_key == key:
+                return slot, offset, length
+            slot = (slot + 1) & mask
+
+    def __resize(self, capacity: int) -> None:
+        previous = self.__index
+        previous_capacity = self.__capacity
+        handle = open(os.path.join(self.__path, f'index.{capacity}.bin'), 'w+b')
+        handle.truncate(capacity * Storage.SLOT.size)
+        self.__index = mmap.mmap(handle.fileno(), capacity * Storage.SLOT.size)
+        handle.close()
+        self.__capacity = capacity
+        if previous is not None:
+            for slot in range(previous_capacity):
+                key, offset, length = Storage.SLOT.unpack_from(previous, slot * Storage.SLOT.size)
+                if offset != 0:
+                    Storage.SLOT.pack_into(self.__index, self.__find(key)[0] * Storage.SLOT.size, key, offset, length)
+            previous.close()
+            os.remove(os.path.join(self.__path, f'index.{previous_capacity}.bin'))
+
+    def __remember(self, key: int, value: object) -> None:
+        if key in self.__cache:
+            self.__cached -= self.__cache.pop(key)[1]
+        size = Storage.ENTRY + sys.getsizeof(value)
+        self.__cache[key] = (value, size)
+        self.__cached += size
+        while self.__cached > self.__budget and len(self.__cache) > 1:
+            self.__cached -= self.__cache.popitem(last=False)[1][1]
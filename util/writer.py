@@ -0,0 +1,200 @@
+import collections
+import concurrent.futures
+import os
+import struct
+import typing
+import zipfile
+import zlib
+import lxml.etree # type: ignore
+import pptx, pptx.opc.constants, pptx.opc.oxml, pptx.opc.packuri, pptx.opc.spec, pptx.oxml.ns, pptx.presentation
+
+Entry = tuple[str, int, int, int, int, int]
+
+
+class Writer:
+
+    TIMESTAMP = (1980, 1, 1, 0, 0, 0)
+    LEVEL = 6
+    STORED = ('.png', '.jpg', '.jpeg', '.gif', '.mp3', '.mp4', '.m4a')
+    WINDOW = 64
+    HEADER = struct.Struct('<4s2B4HL2L2H')
+    CENTRAL = struct.Struct('<4s4B4HL2L5H2L')
+    END = struct.Struct('<4s4H2LH')
+    END64 = struct.Struct('<4sQ2H2L4Q')
+    LOCATOR = struct.Struct('<4sLQL')
+
+    def __init__(self, path: str | typing.BinaryIO, presentation: pptx.presentation.Presentation, level: int = LEVEL, workers: None | int = None) -> None:
+        self.__file = open(path, 'wb') if isinstance(path, str) else path
+        self.__owned = isinstance(path, str)
+        self.__presentation = presentation
+        self.__level = level
+        self.__executor = None if (workers or os.cpu_count() or 1) <= 1 else concurrent.futures.ThreadPoolExecutor(workers or os.cpu_count())
+        self.__pending: collections.deque[tuple[str, concurrent.futures.Future]] = collections.deque()
+        self.__entries: list[Entry] = []
+        self.__offset = 0
+        self.__content_types: dict[str, str] = {}
+        self.__count = 0
+
+    @property
+    def count(self) -> int:
+        return self.__count
+
+    def add_part(self, partname: str, content_type: str, blob: bytes) -> None:
+        if partname in self.__content_types:
+            return
+        self.__content_types[partname] = content_type
+        self.__write(partname[1:], blob)
+
+    def add_slide(self, blob: bytes, rels: list[tuple[str, str, str]]) -> None:
+        self.__count += 1
+        partname = f'/ppt/slides/slide{self.__count}.xml'
+        self.add_part(partname, pptx.opc.constants.CONTENT_TYPE.PML_SLIDE, blob)
+        self.__write(f'ppt/slides/_rels/slide{self.__count}.xml.rels', Writer.__get_rels_xml(rels))
+
+    def close(self) -> None:
+        package = self.__presentation.part.package
+        for part in package.iter_parts():
+            if part is self.__presentation.part:
+                self.__add_presentation()
+            elif part.partname not in self.__content_types:
+                self.add_part(part.partname, part.content_type, part.blob)
+                if len(part.rels) > 0:
+                    self.__write(part.partname.rels_uri.membername, part.rels.xml)
+        self.__finish()
+
+    def save(self) -> None:
+        package = self.__presentation.part.package
+        for part in package.iter_parts():
+            self.add_part(part.partname, part.content_type, part.blob)
+            if len(part.rels) > 0:
+                self.__write(part.partname.rels_uri.membername, part.rels.xml)
+        self.__finish()
+
+    def __finish(self) -> None:
+        self.__write('_rels/.rels', self.__presentation.part.package._rels.xml)
+        self.__write('[Content_Types].xml', self.__get_content_types_xml())
+        while len(self.__pending) > 0:
+            self.__emit()
+        if self.__executor is not None:
+            self.__executor.shutdown()
+        self.__close_archive()
+        if self.__owned:
+            self.__file.close()
+
+    def __write(self, name: str, blob: bytes) -> None:
+        method = zipfile.ZIP_STORED if name.lower().endswith(Writer.STORED) else zipfile.ZIP_DEFLATED
+        if self.__executor is None:
+            future: concurrent.futures.Future = concurrent.futures.Future()
+            future.set_result(Writer.__compress(blob, method, self.__level))
+        else:
+            future = self.__executor.submit(Writer.__compress, blob, method, self.__level)
+        self.__pending.append((name, future))
+        if len(self.__pending) > Writer.WINDOW:
+            self.__emit()
+
+    def __emit(self) -> None:
+        name, future = self.__pending.popleft()
+        method, crc, data, size = future.result()
+        encoded = name.encode()
+        zip64 = size >= zipfile.ZIP64_LIMIT or len(data) >= zipfile.ZIP64_LIMIT
+        extra = struct.pack('<2H2Q', 1, 16, size, len(data)) if zip64 else b''
+        time, date = Writer.__get_dos_time()
+        self.__file.write(Writer.HEADER.pack(
+            b'PK\x03\x04', 45 if zip64 else 20, 0, 0x800 if not encoded.isascii() else 0, method, time, date, crc,
+            0xFFFFFFFF if zip64 else len(data), 0xFFFFFFFF if zip64 else size, len(encoded), len(extra),
+        ))
+        self.__file.write(encoded)
+        self.__file.write(extra)
+        self.__file.write(data)
+        self.__entries.append((name, method, crc, len(data), size, self.__offset))
+        self.__offset += Writer.HEADER.size + len(encoded) + len(extra) + len(data)
+
+    def __close_archive(self) -> None:
+        start = self.__offset
+        time, date = Writer.__get_dos_time()
+        for name, method, crc, compressed, size, offset in self.__entries:
+            encoded = name.encode()
+            values = [value for value in (size, compressed, offset) if value >= zipfile.ZIP64_LIMIT]
+            extra = struct.pack(f'<2H{len(values)}Q', 1, 8 * len(values), *values) if len(values) > 0 else b''
+            self.__file.write(Writer.CENTRAL.pack(
+                b'PK\x01\x02', 45 if len(values) > 0 else 20, 3, 45 if len(values) > 0 else 20, 0,
+                0x800 if not encoded.isascii() else 0, method, time, date, crc,
+                0xFFFFFFFF if compressed >= zipfile.ZIP64_LIMIT else compressed,
+                0xFFFFFFFF if size >= zipfile.ZIP64_LIMIT else size,
+                len(encoded), len(extra), 0, 0, 0, 0o600 << 16,
+                0xFFFFFFFF if offset >= zipfile.ZIP64_LIMIT else offset,
+            ))
+            self.__file.write(encoded)
+            self.__file.write(extra)
+            self.__offset += Writer.CENTRAL.size + len(encoded) + len(extra)
+        count = len(self.__entries)
+        length = self.__offset - start
+        if count >= zipfile.ZIP_FILECOUNT_LIMIT or length >= zipfile.ZIP64_LIMIT or start >= zipfile.ZIP64_LIMIT:
+            self.__file.write(Writer.END64.pack(b'PK\x06\x06', Writer.END64.size - 12, 45, 45, 0, 0, count, count, length, start))
+            self.__file.write(Writer.LOCATOR.pack(b'PK\x06\x07', 0, self.__offset, 1))
+            count = min(count, 0xFFFF)
+            length = min(length, 0xFFFFFFFF)
+            start = min(start, 0xFFFFFFFF)
+        self.__file.write(Writer.END.pack(b'PK\x05\x06', 0, 0, count, count, length, start, 0))
+
+    def __add_presentation(self) -> None:
+        part = self.__presentation.part
+        rels = [
+            (rel.rId, rel.reltype, rel.target_ref)
+            for rel in part.rels.values()
+        ]
+        element = lxml.etree.fromstring(part.blob)
+        slides = element.find(pptx.oxml.ns.qn('p:sldIdLst'))
+        if slides is None:
+            slides = lxml.etree.Element(pptx.oxml.ns.qn('p:sldIdLst'))
+            element.find(pptx.oxml.ns.qn('p:sldMasterIdLst')).addnext(slides)
+        for child in list(slides):
+            slides.remove(child)
+        offset = len(rels)
+        for index in range(self.__count):
+            rId = f'rId{offset + index + 1}'
+            rels.append((rId, pptx.opc.constants.RELATIONSHIP_TYPE.SLIDE, f'slides/slide{index + 1}.xml'))
+            lxml.etree.SubElement(slides, pptx.oxml.ns.qn('p:sldId'), {
+                'id': str(256 + index),
+                pptx.oxml.ns.qn('r:id'): rId,
+            })
+        self.add_part(part.partname, part.content_type, lxml.etree.tostring(element, encoding='UTF-8', standalone=True))
+        self.__write(part.partname.rels_uri.membername, Writer.__get_rels_xml(rels))
+
+    def __get_content_types_xml(self) -> bytes:
+        defaults = {
+            'rels': pptx.opc.constants.CONTENT_TYPE.OPC_RELATIONSHIPS,
+            'xml': pptx.opc.constants.CONTENT_TYPE.XML,
+        }
+        overrides = {}
+        for partname, content_type in self.__content_types.items():
+            extension = partname.rsplit('.', 1)[-1]
+            if (extension.lower(), content_type) in pptx.opc.spec.default_content_types:
+                defaults[extension] = content_type
+            else:
+                overrides[partname] = content_type
+        element = pptx.opc.oxml.CT_Types.new()
+        for extension, content_type in sorted(defaults.items()):
+            element.add_default(extension, content_type)
+        for partname, content_type in sorted(overrides.items()):
+            element.add_override(pptx.opc.packuri.PackURI(partname), content_type)
+        return pptx.opc.oxml.serialize_part_xml(element)
+
+    @staticmethod
+    def __get_rels_xml(rels: list[tuple[str, str, str]]) -> bytes:
+        element = pptx.opc.oxml.CT_Relationships.new()
+        for rId, reltype, target in sorted(rels, key=lambda rel: int(rel[0][3:])):
+            element.add_rel(rId, reltype, target, reltype == pptx.opc.constants.RELATIONSHIP_TYPE.HYPERLINK)
+        return element.xml_file_bytes
+
+    @staticmethod
+    def __compress(blob: bytes, method: int, level: int) -> tuple[int, int, bytes, int]:
+        if method == zipfile.ZIP_STORED:
+            return method, zlib.crc32(blob), blob, len(blob)
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        return method, zlib.crc32(blob), compressor.compress(blob) + compressor.flush(), len(blob)
+
+    @staticmethod
+    def __get_dos_time() -> tuple[int, int]:
+        year, month, day, hour, minute, second = Writer.TIMESTAMP
+        return hour << 11 | minute << 5 | second // 2, (year - 1980) << 9 | month << 5 | day
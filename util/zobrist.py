@@ -0,0 +1,12 @@
+import functools
+import hashlib
+
+
+class Zobrist:
+
+    @staticmethod
+    @functools.cache
+    def get(*parts: object) -> int:
+        sponge = repr(parts).encode()
+        sponge = hashlib.blake2b(sponge, digest_size=8)
+        return int.from_bytes(sponge.digest(), 'little')